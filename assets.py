@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+
+PENDING, READY, FAILED = "pending", "ready", "failed"
+
+
+class AssetManager:
+    """Loads sounds and images on a background thread and keeps them.
+
+    ``load_sound``/``load_image`` return at once; ``state`` reports whether
+    an asset is pending, ready or failed, and ``get`` returns it only once
+    it is ready, so the game loop never waits on the disk or a decoder.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assets")
+        self.futures = {}
+        self.converted = {}
+
+    def load_sound(self, name, path):
+        """Decode ``path`` fully into a pygame Sound (the mixer must be initialized)."""
+        return self._submit(name, pygame.mixer.Sound, path)
+
+    def load_image(self, name, path):
+        return self._submit(name, pygame.image.load, path)
+
+    def _submit(self, name, loader, path):
+        if name not in self.futures:
+            self.futures[name] = self.executor.submit(loader, path)
+        return self.futures[name]
+
+    def state(self, name):
+        """PENDING, READY or FAILED; names never requested count as failed."""
+        future = self.futures.get(name)
+        if future is None or (future.done() and future.exception() is not None):
+            return FAILED
+        return READY if future.done() else PENDING
+
+    def get(self, name):
+        """Return the asset if it has loaded, else None."""
+        if self.state(name) != READY:
+            return None
+        asset = self.futures[name].result()
+        if isinstance(asset, pygame.Surface):
+            # Surfaces are converted on the main thread, once a display exists
+            if name not in self.converted and pygame.display.get_surface() is not None:
+                self.converted[name] = (asset.convert_alpha() if asset.get_alpha() is not None
+                                        else asset.convert())
+            asset = self.converted.get(name, asset)
+        return asset
+
+    def when_loaded(self, name, callback):
+        """Call ``callback(asset or None)`` once ``name`` has loaded or failed.
+
+        The callback runs on the loader thread, or right away if loading is
+        already over.
+        """
+        def done(future):
+            callback(None if future.exception() else future.result())
+        self.futures[name].add_done_callback(done)
+
+
+assets = AssetManager()
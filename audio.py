@@ -0,0 +1,58 @@
+import threading
+import pygame
+from assets import assets as default_assets
+
+MUSIC_FILE = "background_music.mp3"
+# Reserved mixer channel the music loops on
+MUSIC_CHANNEL = 0
+
+
+class MusicPlayer:
+    """Background music, decoded once on the asset thread and looped on its own channel.
+
+    Restarting only rewinds the channel, so it never touches the file.
+    Calling ``play`` before the music has loaded starts it once it has.
+    """
+
+    def __init__(self, path=MUSIC_FILE, volume=0.5, assets=default_assets):
+        self.path = path
+        self.volume = volume
+        self.assets = assets
+        self.wanted = False
+        self.lock = threading.Lock()
+        if pygame.mixer.get_init():
+            pygame.mixer.set_reserved(MUSIC_CHANNEL + 1)
+            assets.load_sound(path, path)
+            assets.when_loaded(path, self._loaded)
+        # Otherwise there is no audio device; play silently
+
+    def _start(self, sound):
+        if sound is not None:
+            sound.set_volume(self.volume)
+            pygame.mixer.Channel(MUSIC_CHANNEL).play(sound, loops=-1)  # Loop indefinitely
+
+    def _loaded(self, sound):
+        with self.lock:
+            if self.wanted:
+                self._start(sound)
+
+    def play(self):
+        with self.lock:
+            self.wanted = True
+            self._start(self.assets.get(self.path))
+
+    def stop(self):
+        with self.lock:
+            self.wanted = False
+            if pygame.mixer.get_init():
+                pygame.mixer.Channel(MUSIC_CHANNEL).stop()
+
+
+class NullAudio:
+    """Audio backend that does nothing, for headless runs."""
+
+    def play(self):
+        pass
+
+    def stop(self):
+        pass
@@ -0,0 +1,353 @@
+"""Many games stepped in lockstep, as an environment for training bots.
+
+BatchEnv plays N independent games by the same rules as Game, but keeps
+every game's player, timers, obstacles and rockets in NumPy arrays (one
+row per game), so a single step() advances all of them in a handful of
+vectorized passes. Obstacles are rolled by the same Obstacle class from
+a per-game seeded RNG: given its seed and actions, each game plays out
+exactly as a headless Game would.
+
+The interface follows Gym's vectorized environments. reset() returns the
+first observations, and step(actions) returns (observations, rewards,
+dones, info). A game that ends is reset straight away, so the
+observation returned for it is the first one of its next game, and its
+final score is in info["final_scores"].
+
+Usage: python batch_env.py [--games N] [--ticks N] [--difficulty NAME] [--seed N]
+"""
+import argparse
+import random
+import time
+import numpy as np
+from collision import overlap_interval, first_contact
+from constants import (
+    WIDTH, HEIGHT, PLAYER_SIZE, PLAYER_SPEED, OBSTACLE_MAX_SIZE, MAX_SPEED,
+    SPAWN_RATE, SCORE_PER_SECOND, DIFFICULTIES, MAX_ROCKETS, TICK_MS,
+    ROCKET_WIDTH, ROCKET_HEIGHT, ROCKET_SPEED
+)
+from obstacle import Obstacle
+
+# Obstacles described in each observation, nearest to the player first
+OBSERVED_OBSTACLES = 8
+# Per obstacle: present, centre offset from the player (x, y), size, speed
+OBSTACLE_FEATURES = 5
+# Player centre (x, y), rockets available, then the obstacles
+OBSERVATION_SIZE = 3 + OBSERVED_OBSTACLES * OBSTACLE_FEATURES
+
+# Sorts after every real id when breaking ties
+NO_ID = np.iinfo(np.int64).max
+
+
+class BatchEnv:
+    """``count`` games of one difficulty (a DIFFICULTIES name or a settings dict).
+
+    Actions are an integer array of shape (count, 3) holding each game's
+    keyboard direction (dx, dy: -1, 0 or 1) and whether to fire. Each
+    step's reward is the score gained during it. Observations are
+    float32 arrays of shape (count, OBSERVATION_SIZE), with positions as
+    fractions of the playfield.
+
+    Obstacles and rockets live in fixed slots of per-game rows that grow
+    when a game runs out. A slot keeps its entity's spawn-order id, which
+    decides ties the same way Game's list order does.
+    """
+
+    _OBSTACLE_ARRAYS = ("obstacle_alive", "obstacle_id", "obstacle_x", "obstacle_y",
+                        "obstacle_prev_y", "obstacle_size", "obstacle_speed")
+    _ROCKET_ARRAYS = ("rocket_alive", "rocket_id", "rocket_x", "rocket_y", "rocket_prev_y")
+
+    def __init__(self, count, difficulty="Medium", seed=None, tick_ms=TICK_MS):
+        self.count = count
+        self.settings = DIFFICULTIES[difficulty] if isinstance(difficulty, str) else difficulty
+        self.tick_ms = tick_ms
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start every game afresh and return the first observations.
+
+        Each game's seed is drawn from ``seed``; ``seeds`` holds the ones
+        currently playing, so any game can be replayed with Game.reset.
+        """
+        n = self.count
+        self.seeder = random.Random(seed)
+        self.seeds = np.zeros(n, dtype=np.int64)
+        self.rngs = [None] * n
+        self.player_x = np.zeros(n)
+        self.player_y = np.zeros(n)
+        self.player_prev_x = np.zeros(n)
+        self.player_prev_y = np.zeros(n)
+        # Simulated ms since each game started, and its spawn and refill timers
+        self.now = np.zeros(n)
+        self.last_spawn_time = np.zeros(n)
+        self.last_rocket_refill = np.zeros(n)
+        self.rockets_available = np.zeros(n, dtype=np.int64)
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.next_obstacle_id = np.zeros(n, dtype=np.int64)
+        self.next_rocket_id = np.zeros(n, dtype=np.int64)
+        self._allocate(self._OBSTACLE_ARRAYS, 16)
+        self._allocate(self._ROCKET_ARRAYS, MAX_ROCKETS + 1)
+        self._restart(np.arange(n))
+        return self.observe()
+
+    def _allocate(self, names, capacity):
+        for name in names:
+            kind = bool if name.endswith("alive") else np.int64 if name.endswith("id") else float
+            setattr(self, name, np.zeros((self.count, capacity), dtype=kind))
+
+    def _grow(self, names):
+        for name in names:
+            old = getattr(self, name)
+            new = np.zeros((self.count, old.shape[1] * 2), dtype=old.dtype)
+            new[:, :old.shape[1]] = old
+            setattr(self, name, new)
+
+    def _free_slots(self, games, names):
+        """Return a free slot in each of ``games``' rows, growing the rows if needed."""
+        alive = getattr(self, names[0])
+        slots = alive[games].argmin(axis=1)
+        if alive[games, slots].any():
+            self._grow(names)
+            slots = getattr(self, names[0])[games].argmin(axis=1)
+        return slots
+
+    def _restart(self, games):
+        """Reset ``games`` to the start of a new game, as Game.reset does."""
+        for i in games.tolist():
+            self.seeds[i] = self.seeder.randrange(2**32)
+            self.rngs[i] = random.Random(int(self.seeds[i]))
+        self.player_x[games] = self.player_prev_x[games] = WIDTH // 2
+        self.player_y[games] = self.player_prev_y[games] = HEIGHT - 100
+        self.now[games] = 0
+        self.last_spawn_time[games] = 0
+        self.last_rocket_refill[games] = 0
+        self.rockets_available[games] = MAX_ROCKETS
+        self.scores[games] = 0
+        self.next_obstacle_id[games] = 0
+        self.next_rocket_id[games] = 0
+        self.obstacle_alive[games] = False
+        self.rocket_alive[games] = False
+
+    def step(self, actions):
+        """Run one tick of every game; see the class docstring for the format."""
+        actions = np.asarray(actions)
+        if actions.shape != (self.count, 3):
+            raise ValueError(f"expected actions of shape ({self.count}, 3), got {actions.shape}")
+        dx, dy, fire = actions.T
+        seconds = self.tick_ms / 1000
+
+        # Input, in Game.apply_input's order: fire from where the player
+        # was, then move
+        self.player_prev_x[:] = self.player_x
+        self.player_prev_y[:] = self.player_y
+        firing = np.flatnonzero((fire != 0) & (self.rockets_available > 0))
+        if len(firing):
+            self._fire(firing)
+        step = PLAYER_SPEED * seconds
+        self.player_x = np.maximum(0, np.minimum(WIDTH - PLAYER_SIZE, self.player_x + dx * step))
+        self.player_y = np.maximum(0, np.minimum(HEIGHT - PLAYER_SIZE, self.player_y + dy * step))
+
+        # Game.update
+        self.now += self.tick_ms
+        scores = (self.now / 1000 * SCORE_PER_SECOND).astype(np.int64)
+        rewards = scores - self.scores
+        self.scores = scores
+        self._spawn()
+        self.rocket_prev_y[:] = self.rocket_y
+        self.rocket_y -= ROCKET_SPEED * seconds
+        offscreen = self.rocket_y + ROCKET_HEIGHT < 0
+        self.obstacle_prev_y[:] = self.obstacle_y
+        self.obstacle_y += self.obstacle_speed * seconds
+
+        destroyed, used = self._rocket_hits()
+        dones = self._player_hits(destroyed)
+        self.obstacle_alive &= np.isinf(destroyed) & ~(self.obstacle_y > HEIGHT)
+        self.rocket_alive &= ~(offscreen | used)
+        self._refill()
+
+        final_scores = np.where(dones, self.scores, 0)
+        finished = np.flatnonzero(dones)
+        if len(finished):
+            self._restart(finished)
+        return self.observe(), rewards, dones, {"final_scores": final_scores}
+
+    def _fire(self, games):
+        slots = self._free_slots(games, self._ROCKET_ARRAYS)
+        self.rocket_alive[games, slots] = True
+        self.rocket_id[games, slots] = self.next_rocket_id[games]
+        self.rocket_x[games, slots] = self.player_x[games] + PLAYER_SIZE // 2 - 5
+        self.rocket_y[games, slots] = self.rocket_prev_y[games, slots] = self.player_y[games]
+        self.next_rocket_id[games] += 1
+        self.rockets_available[games] -= 1
+
+    def _spawn(self):
+        spawn_rate = SPAWN_RATE * self.settings["spawn_multiplier"]
+        # A game far enough behind spawns more than once, as in Game
+        games = np.flatnonzero(self.now - self.last_spawn_time > 1000 / spawn_rate)
+        while len(games):
+            self._spawn_in(games)
+            self.last_spawn_time[games] += 1000 / spawn_rate
+            games = np.flatnonzero(self.now - self.last_spawn_time > 1000 / spawn_rate)
+
+    def _spawn_in(self, games):
+        # Rolled one by one from each game's own RNG, exactly as Game does
+        rolls = [Obstacle(self.settings, self.rngs[i]) for i in games.tolist()]
+        slots = self._free_slots(games, self._OBSTACLE_ARRAYS)
+        self.obstacle_alive[games, slots] = True
+        self.obstacle_id[games, slots] = self.next_obstacle_id[games]
+        self.obstacle_x[games, slots] = [obstacle.x for obstacle in rolls]
+        self.obstacle_y[games, slots] = [obstacle.y for obstacle in rolls]
+        self.obstacle_prev_y[games, slots] = self.obstacle_y[games, slots]
+        self.obstacle_size[games, slots] = [obstacle.size for obstacle in rolls]
+        self.obstacle_speed[games, slots] = [obstacle.speed for obstacle in rolls]
+        self.next_obstacle_id[games] += 1
+
+    def _refill(self):
+        refill_time = self.settings["rocket_refill_time"] * 1000
+        due = self.now - self.last_rocket_refill > refill_time
+        while due.any():
+            self.rockets_available += due & (self.rockets_available < MAX_ROCKETS)
+            self.last_rocket_refill[due] += refill_time
+            due = self.now - self.last_rocket_refill > refill_time
+
+    def _rocket_hits(self):
+        """Find which rockets hit which obstacles during the last tick, as Game.rocket_hits.
+
+        Returns (time each obstacle was destroyed, inf if it wasn't; mask
+        of rockets used).
+        """
+        destroyed = np.full(self.obstacle_alive.shape, np.inf)
+        used = np.zeros(self.rocket_alive.shape, dtype=bool)
+        games = np.flatnonzero(self.rocket_alive.any(axis=1) & self.obstacle_alive.any(axis=1))
+        if not len(games):
+            return destroyed, used
+
+        # Pair every rocket with the obstacles of its game that line up
+        # horizontally (neither moves sideways), then test the pairs in one pass
+        size = self.obstacle_size[games, None, :]
+        gap_x = self.obstacle_x[games, None, :] - self.rocket_x[games, :, None]
+        pairs = (gap_x > -size) & (gap_x < ROCKET_WIDTH)
+        pairs &= self.rocket_alive[games, :, None] & self.obstacle_alive[games, None, :]
+        g, r, o = np.nonzero(pairs)
+        hit, when = first_contact(overlap_interval(
+            self.obstacle_prev_y[games[g], o] - self.rocket_prev_y[games[g], r],
+            self.obstacle_y[games[g], o] - self.rocket_y[games[g], r],
+            -size[g, 0, o], ROCKET_HEIGHT))
+        g, r, o = g[hit], r[hit], o[hit]
+        times = np.full(pairs.shape, np.inf)
+        times[g, r, o] = when[hit]
+        keep = np.isfinite(times).any(axis=(1, 2))
+        games, times = games[keep], times[keep]
+        rocket_ids = np.where(self.rocket_alive[games], self.rocket_id[games], NO_ID)
+        obstacle_ids = np.where(self.obstacle_alive[games], self.obstacle_id[games], NO_ID)
+        rows = np.arange(len(games))
+
+        # Hand out hits in time order, one per game per round: the earliest
+        # hit left takes its rocket and obstacle out of the running. Ties go
+        # to the rocket fired first, then the older obstacle, like Game's heap
+        while len(rows):
+            first = times[rows].min(axis=(1, 2))
+            pending = np.isfinite(first)
+            rows, first = rows[pending], first[pending]
+            if not len(rows):
+                break
+            tied = times[rows] == first[:, None, None]
+            rocket = np.where(tied.any(axis=2), rocket_ids[rows], NO_ID).argmin(axis=1)
+            obstacle = np.where(tied[np.arange(len(rows)), rocket], obstacle_ids[rows],
+                                NO_ID).argmin(axis=1)
+            destroyed[games[rows], obstacle] = first
+            used[games[rows], rocket] = True
+            times[rows, rocket, :] = np.inf
+            times[rows, :, obstacle] = np.inf
+        return destroyed, used
+
+    def _player_hits(self, destroyed):
+        """Return which players touched an obstacle during the last tick.
+
+        Obstacles a rocket destroyed only count if the player got there first.
+        """
+        # Only obstacles whose swept box meets the player's can have touched it
+        size = self.obstacle_size
+        x = self.obstacle_x
+        top = np.minimum(self.obstacle_prev_y, self.obstacle_y)
+        bottom = np.maximum(self.obstacle_prev_y, self.obstacle_y) + size
+        player_left = np.minimum(self.player_prev_x, self.player_x)[:, None]
+        player_top = np.minimum(self.player_prev_y, self.player_y)[:, None]
+        player_right = np.maximum(self.player_prev_x, self.player_x)[:, None] + PLAYER_SIZE
+        player_bottom = np.maximum(self.player_prev_y, self.player_y)[:, None] + PLAYER_SIZE
+        near = (self.obstacle_alive & (x < player_right) & (x + size > player_left)
+                & (top < player_bottom) & (bottom > player_top))
+        games, slots = np.nonzero(near)
+
+        size = size[games, slots]
+        x = x[games, slots]
+        hit, times = first_contact(
+            overlap_interval(x - self.player_prev_x[games], x - self.player_x[games],
+                             -size, PLAYER_SIZE),
+            overlap_interval(self.obstacle_prev_y[games, slots] - self.player_prev_y[games],
+                             self.obstacle_y[games, slots] - self.player_y[games],
+                             -size, PLAYER_SIZE))
+        hits = np.zeros(self.count, dtype=bool)
+        hits[games[hit & (times < destroyed[games, slots])]] = True
+        return hits
+
+    def observe(self):
+        """Return the current observation of every game.
+
+        Each row holds the player's centre and rockets available, then the
+        OBSERVED_OBSTACLES nearest obstacles: whether the slot is used,
+        the offset of the obstacle's centre from the player's, its size
+        and its speed. Unused slots are all zeros.
+        """
+        n = self.count
+        observations = np.zeros((n, OBSERVATION_SIZE), dtype=np.float32)
+        centre_x = self.player_x + PLAYER_SIZE / 2
+        centre_y = self.player_y + PLAYER_SIZE / 2
+        observations[:, 0] = centre_x / WIDTH
+        observations[:, 1] = centre_y / HEIGHT
+        observations[:, 2] = self.rockets_available / MAX_ROCKETS
+
+        half = self.obstacle_size / 2
+        dx = self.obstacle_x + half - centre_x[:, None]
+        dy = self.obstacle_y + half - centre_y[:, None]
+        distance = np.where(self.obstacle_alive, dx * dx + dy * dy, np.inf)
+        k = min(OBSERVED_OBSTACLES, distance.shape[1])
+        nearest = np.argsort(distance, axis=1)[:, :k]
+        rows = np.arange(n)[:, None]
+        present = self.obstacle_alive[rows, nearest]
+        features = np.zeros((n, OBSERVED_OBSTACLES, OBSTACLE_FEATURES), dtype=np.float32)
+        features[:, :k, 0] = present
+        features[:, :k, 1] = np.where(present, dx[rows, nearest] / WIDTH, 0)
+        features[:, :k, 2] = np.where(present, dy[rows, nearest] / HEIGHT, 0)
+        features[:, :k, 3] = np.where(present, self.obstacle_size[rows, nearest] / OBSTACLE_MAX_SIZE, 0)
+        features[:, :k, 4] = np.where(present, self.obstacle_speed[rows, nearest] / MAX_SPEED, 0)
+        observations[:, 3:] = features.reshape(n, -1)
+        return observations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch environment throughput run")
+    parser.add_argument("--games", type=int, default=1024)
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--difficulty", choices=list(DIFFICULTIES), default="Medium")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    env = BatchEnv(args.games, args.difficulty, args.seed)
+    rng = np.random.default_rng(args.seed)
+    finished = 0
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        # Wander randomly and fire now and then
+        actions = rng.integers(-1, 2, (args.games, 3))
+        actions[:, 2] = rng.random(args.games) < 0.02
+        _, _, dones, _ = env.step(actions)
+        finished += int(dones.sum())
+    elapsed = time.perf_counter() - start
+
+    total = args.games * args.ticks
+    print(f"{args.games} games x {args.ticks} ticks, {finished} finished, {elapsed:.2f}s "
+          f"({total / elapsed:.0f} game ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Benchmarks for the game's update and draw hot paths.
+
+Runs under the SDL dummy drivers with Game.obstacles and Game.rockets
+prefilled to each requested count, and prints machine-readable JSON:
+p50/p99/mean milliseconds per call, plus per-frame allocation figures
+from a separate tracemalloc pass (peak KiB allocated while the frame ran,
+and the net change in live memory blocks).
+
+Each case stops after ``--frames`` frames or ``--budget`` seconds,
+whichever comes first, so the largest counts still finish.
+
+Usage: python benchmark.py [--counts 10 100 1000 10000] [--frames N] [--output FILE]
+"""
+import os
+
+# Must be set before SDL starts up
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import pygame
+from constants import WIDTH, HEIGHT, RENDER_SCALE
+from controls import TickInput
+from display import scale_of
+from headless import create_game
+from menu import Menu
+from obstacle import Obstacle
+from renderer import FullRenderer
+from rocket import Rocket
+from starfield import Starfield
+from text_cache import text_cache
+
+COUNTS = [10, 100, 1000, 10000]
+BENCHES = ["update", "collide", "draw", "frame", "menu"]
+
+
+def fill(game, count, rng):
+    """Top the game back up to ``count`` obstacles and rockets."""
+    while len(game.obstacles) < count:
+        obstacle = Obstacle(game.difficulty, rng)
+        obstacle.y = rng.uniform(-obstacle.size, HEIGHT)
+        game.obstacles.add(obstacle)
+    while len(game.rockets) < count:
+        game.rockets.append(Rocket(rng.randint(0, WIDTH), rng.randint(0, HEIGHT)))
+    # Collisions with the player must not stop the simulation
+    game.game_over = False
+
+
+def make_step(bench, game, menu, screen, renderer):
+    def update():
+        game.step(TickInput())
+
+    def draw():
+        game.clear_background(screen)
+        game.draw(screen)
+
+    def frame():
+        update()
+        renderer.begin(screen, game)
+        renderer.present(game.draw(screen))
+
+    def draw_menu():
+        menu.clear_background(screen)
+        menu.draw(screen)
+
+    return {"update": update, "collide": game.collide, "draw": draw,
+            "frame": frame, "menu": draw_menu}[bench]
+
+
+def measure(bench, count, frames, budget, screen, seed):
+    rng = random.Random(seed)
+    game = create_game(seed=seed)
+    game.starfield = Starfield(rng=rng, scale=scale_of(screen))
+    menu = Menu(game)
+    step = make_step(bench, game, menu, screen, FullRenderer())
+
+    # Warm up caches (sprites, text) before measuring
+    for _ in range(3):
+        fill(game, count, rng)
+        step()
+
+    times = []
+    deadline = time.perf_counter() + budget
+    while len(times) < frames and (len(times) < 5 or time.perf_counter() < deadline):
+        fill(game, count, rng)
+        start = time.perf_counter()
+        step()
+        times.append((time.perf_counter() - start) * 1000)
+
+    # Allocation pass, kept separate because tracing slows everything down
+    peaks = []
+    blocks = []
+    gc.disable()
+    tracemalloc.start()
+    for _ in range(min(len(times), 20)):
+        fill(game, count, rng)
+        tracemalloc.reset_peak()
+        before_memory = tracemalloc.get_traced_memory()[0]
+        before_blocks = sys.getallocatedblocks()
+        step()
+        blocks.append(sys.getallocatedblocks() - before_blocks)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before_memory)
+    tracemalloc.stop()
+    gc.enable()
+
+    times.sort()
+    return {
+        "bench": bench,
+        "count": count,
+        "frames": len(times),
+        "p50_ms": round(statistics.median(times), 4),
+        "p99_ms": round(times[min(len(times) - 1, int(len(times) * 0.99))], 4),
+        "mean_ms": round(statistics.fmean(times), 4),
+        "alloc_peak_kib_per_frame": round(statistics.fmean(peaks) / 1024, 2),
+        "net_blocks_per_frame": round(statistics.fmean(blocks), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Falling Blocks hot path benchmarks")
+    parser.add_argument("--counts", type=int, nargs="+", default=COUNTS,
+                        help="obstacle and rocket counts to prefill")
+    parser.add_argument("--bench", choices=BENCHES, nargs="+", default=BENCHES)
+    parser.add_argument("--frames", type=int, default=300, help="frames per case")
+    parser.add_argument("--budget", type=float, default=5.0,
+                        help="seconds of measurement per case")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--render-scale", type=float, default=RENDER_SCALE,
+                        help="draw into a target this fraction of the playfield size")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    screen = pygame.display.set_mode((round(WIDTH * args.render_scale),
+                                      round(HEIGHT * args.render_scale)))
+    results = []
+    for bench in args.bench:
+        for count in args.counts:
+            result = measure(bench, count, args.frames, args.budget, screen, args.seed)
+            results.append(result)
+            print(f"{bench:>7} {count:>6}: p50 {result['p50_ms']:.3f} ms, "
+                  f"p99 {result['p99_ms']:.3f} ms", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "sdl_video_driver": os.environ["SDL_VIDEODRIVER"],
+        "render_size": list(screen.get_size()),
+        "text_cache": {"hits": text_cache.hits, "misses": text_cache.misses},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,28 @@
 import pygame
-from constants import BUTTON_COLOR, BUTTON_HOVER, WHITE, font_medium
+from constants import BUTTON_COLOR, BUTTON_HOVER, WHITE
+from display import scale_of, to_pixels
+from fonts import font_medium, scaled
+from text_cache import render_text
 
 class Button:
     def __init__(self, x, y, width, height, text, action=None):
+        # In world units, like the mouse positions it is tested against
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
         self.action = action
         self.hovered = False
         
     def draw(self, surface):
+        scale = scale_of(surface)
+        rect = to_pixels(self.rect, scale)
+        radius = round(10 * scale)
         color = BUTTON_HOVER if self.hovered else BUTTON_COLOR
-        pygame.draw.rect(surface, color, self.rect, border_radius=10)
-        pygame.draw.rect(surface, WHITE, self.rect, 2, border_radius=10)
+        pygame.draw.rect(surface, color, rect, border_radius=radius)
+        drawn = pygame.draw.rect(surface, WHITE, rect, 2, border_radius=radius)
         
-        text_surf = font_medium.render(self.text, True, WHITE)
-        text_rect = text_surf.get_rect(center=self.rect.center)
-        surface.blit(text_surf, text_rect)
+        text_surf = render_text(scaled(font_medium, scale), self.text, WHITE)
+        text_rect = text_surf.get_rect(center=rect.center)
+        return drawn.union(surface.blit(text_surf, text_rect))
         
     def check_hover(self, pos):
         self.hovered = self.rect.collidepoint(pos)
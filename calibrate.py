@@ -0,0 +1,151 @@
+"""Monte Carlo difficulty calibration.
+
+Plays a heuristic bot through headless games across many seeds on every
+core, and reports survival-time distributions per difficulty setting.
+Without sweep options each DIFFICULTIES entry is measured as-is; with
+--speed/--spawn/--refill every combination of the given values is tried.
+
+Each finished run is appended to the --output JSONL file as soon as it
+completes, and runs already in that file are skipped, so an interrupted
+sweep resumes where it stopped.
+
+Usage: python calibrate.py [--seeds N] [--speed 0.8 1.0] [--spawn 1.0 1.2]
+                           [--refill 3 4] [--output FILE] [--workers N]
+"""
+import os
+
+# Must be set before SDL starts up
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import itertools
+import json
+import statistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import headless
+from constants import WIDTH, DIFFICULTIES, TICK_MS
+MAX_SECONDS = 180
+# How far above the player the bot looks for threats, in pixels
+LOOKAHEAD = 260
+
+
+def bot_policy(game):
+    """Dodge sideways away from obstacles about to land, and shoot what's overhead."""
+    player = game.player
+    store = game.obstacles
+    n = store.count
+    if not n:
+        return 0, 0, False
+    x = store.x[:n]
+    bottom = store.y[:n] + store.size[:n]
+    right = x + store.size[:n]
+    above = (bottom <= player.y + player.size) & (bottom > player.y - LOOKAHEAD)
+
+    best_dx, best_danger = 0, None
+    for dx in (0, -1, 1):
+        px = min(max(player.x + dx * player.speed * game.tick_ms / 1000, 0), WIDTH - player.size)
+        # Obstacles over the candidate column, weighted by how close they are
+        over = above & (x < px + player.size + 10) & (right > px - 10)
+        danger = float((1.0 / (player.y + player.size - bottom[over] + 1)).sum())
+        if best_danger is None or danger < best_danger - 1e-9:
+            best_dx, best_danger = dx, danger
+
+    centre = player.x + player.size / 2
+    overhead = above & (x < centre) & (right > centre)
+    fire = bool(overhead.any()) and game.rockets_available > 0
+    return best_dx, 0, fire
+
+
+def run_one(task):
+    """Play one seeded game with the bot. Runs in a worker process."""
+    key, settings, seed = task
+    game = headless.create_game(seed=seed)
+    game.custom_settings = settings
+    game.reset(seed)
+    ticks = headless.run(game, int(MAX_SECONDS * 1000 / TICK_MS), bot_policy)
+    return {
+        "config": key,
+        "settings": settings,
+        "seed": seed,
+        "survival_s": round(ticks * TICK_MS / 1000, 3),
+        "score": game.score,
+        "survived": not game.game_over,
+    }
+
+
+def configs(args):
+    """Return {key: settings} for every configuration to measure."""
+    if not (args.speed or args.spawn or args.refill):
+        return {name: dict(settings) for name, settings in DIFFICULTIES.items()}
+    base = DIFFICULTIES["Medium"]
+    result = {}
+    for speed, spawn, refill in itertools.product(
+            args.speed or [base["speed_multiplier"]],
+            args.spawn or [base["spawn_multiplier"]],
+            args.refill or [base["rocket_refill_time"]]):
+        result[f"speed={speed}/spawn={spawn}/refill={refill}"] = {
+            "speed_multiplier": speed,
+            "spawn_multiplier": spawn,
+            "rocket_refill_time": refill,
+        }
+    return result
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    results = []
+    with open(path) as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                pass  # Line cut short by an interrupted run; it will be redone
+    return results
+
+
+def summarize(results, keys):
+    print(f"{'config':<40} {'runs':>6} {'p10':>7} {'p50':>7} {'p90':>7} {'mean':>7} {'capped':>7}")
+    for key in keys:
+        survival = sorted(r["survival_s"] for r in results if r["config"] == key)
+        if not survival:
+            continue
+        deciles = statistics.quantiles(survival, n=10) if len(survival) > 1 else survival * 9
+        capped = sum(r["survived"] for r in results if r["config"] == key) / len(survival)
+        print(f"{key:<40} {len(survival):>6} {deciles[0]:>7.1f} {statistics.median(survival):>7.1f} "
+              f"{deciles[8]:>7.1f} {statistics.fmean(survival):>7.1f} {capped:>7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate difficulty settings with a bot")
+    parser.add_argument("--seeds", type=int, default=1000, help="games per configuration")
+    parser.add_argument("--speed", type=float, nargs="+", help="speed multipliers to sweep")
+    parser.add_argument("--spawn", type=float, nargs="+", help="spawn multipliers to sweep")
+    parser.add_argument("--refill", type=float, nargs="+", help="rocket refill times to sweep")
+    parser.add_argument("--output", default="calibration.jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    settings = configs(args)
+    results = load_results(args.output)
+    done = {(r["config"], r["seed"]) for r in results}
+    tasks = [(key, config, seed) for key, config in settings.items()
+             for seed in range(args.seeds) if (key, seed) not in done]
+    print(f"{len(tasks)} runs to go ({len(done)} already in {args.output})")
+
+    with open(args.output, "a") as out, ProcessPoolExecutor(args.workers) as pool:
+        futures = [pool.submit(run_one, task) for task in tasks]
+        for i, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            if i % 100 == 0:
+                print(f"{i}/{len(tasks)} runs done")
+
+    summarize(results, list(settings))
+
+
+if __name__ == "__main__":
+    main()
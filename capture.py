@@ -0,0 +1,266 @@
+"""Recording the frames the game draws, without holding up the game loop.
+
+Capturing a frame costs the game loop a single copy, straight from the
+surface's pixels into a free buffer of a ring allocated when recording
+starts. A background thread turns the buffer into RGB, optionally
+downscales it, and writes it to a raw RGB24 video file or a numbered PNG
+sequence. The buffer then goes back in the ring. If the writer falls
+behind and every buffer is in use, new frames are dropped (and counted)
+rather than slowing the game down.
+
+The writer only uses NumPy, zlib and file writes, which all release the
+GIL, so the game loop keeps running while frames are encoded. That's
+also why PNGs are written here rather than by pygame.image.save, which
+holds the GIL for the whole encode.
+
+Raw files hold the frames back to back, and can be encoded with e.g.
+ffmpeg -f rawvideo -pixel_format rgb24 -video_size WxH -framerate 60 -i FILE out.mp4
+
+pixels() returns a surface's RGB pixels as an array, e.g. for pixel
+observations in headless runs.
+"""
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+import numpy as np
+import pygame
+from constants import CAPTURE_BUFFERS
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_HEADER = struct.Struct(">IIBBBBB")  # width, height, bit depth, color type, methods
+# Fast over small; game frames are mostly flat colour and compress well anyway
+PNG_LEVEL = 1
+
+
+def _channel_offsets(surface):
+    """Byte offsets of red, green and blue within ``surface``'s pixels, or None.
+
+    Only known for 32-bit pixels with 8-bit channels, which covers the
+    display and every surface converted to it.
+    """
+    if surface.get_bytesize() != 4 or sys.byteorder != "little":
+        return None
+    offsets = []
+    for shift, mask in zip(surface.get_shifts()[:3], surface.get_masks()[:3]):
+        if shift % 8 or mask != 0xFF << shift:
+            return None
+        offsets.append(shift // 8)
+    return offsets
+
+
+def _raw(surface):
+    """``surface``'s pixels as a (height, width) uint32 view; no copy."""
+    return np.asarray(surface.get_view("2")).T
+
+
+def _to_rgb(raw, offsets, out):
+    """Copy 32-bit pixels into the (height, width, 3) RGB array ``out``."""
+    channels = raw.view(np.uint8).reshape(raw.shape + (4,))
+    for i, offset in enumerate(offsets):
+        out[..., i] = channels[..., offset]
+    return out
+
+
+def pixels(surface, out=None):
+    """Return ``surface``'s pixels as a (height, width, 3) RGB uint8 array.
+
+    Fills ``out`` if it's given, so a run collecting pixel observations
+    every tick can reuse one array. For small observations, draw into a
+    small target (see display.py) rather than scaling a big one down.
+    """
+    width, height = surface.get_size()
+    if out is None:
+        out = np.empty((height, width, 3), dtype=np.uint8)
+    offsets = _channel_offsets(surface)
+    if offsets is None:
+        out[:] = pygame.surfarray.pixels3d(surface).transpose(1, 0, 2)
+    else:
+        _to_rgb(_raw(surface), offsets, out)
+    return out
+
+
+def _bins(length, target):
+    """Split ``length`` pixels into ``target`` bins for box filtering.
+
+    Returns (one index per offset into each bin, bin sizes). Offsets past
+    the end of a shorter bin index ``length``, which is padding of zeros.
+    Bins of one size are sampled with strided slices, which are faster.
+    """
+    edges = np.arange(target + 1) * length // target
+    sizes = np.diff(edges)
+    if (sizes == sizes[0]).all():
+        return [slice(k, length, sizes[0]) for k in range(sizes[0])], sizes
+    return [np.where(k < sizes, edges[:-1] + k, length) for k in range(sizes.max())], sizes
+
+
+def _shrinker(size, target):
+    """Return a function box-filtering (height, width, 3) frames of ``size`` down to ``target``.
+
+    Each output pixel averages the block of input pixels it covers. The
+    sums are built up one offset into the blocks at a time, rows then
+    columns, in arrays allocated once.
+    """
+    (width, height), (target_width, target_height) = size, target
+    rows, row_sizes = _bins(height, target_height)
+    cols, col_sizes = _bins(width, target_width)
+    counts = row_sizes[:, None, None] * col_sizes[None, :, None]
+    dtype = np.uint16 if counts.max() * 255 <= 0xFFFF else np.uint32
+    counts = counts.astype(dtype)
+    padded = np.zeros((height + 1, width + 1, 3), dtype=np.uint8)
+    tall = np.zeros((target_height, width + 1, 3), dtype=dtype)
+    sums = np.zeros((target_height, target_width, 3), dtype=dtype)
+
+    def shrink(frame):
+        padded[:height, :width] = frame
+        tall.fill(0)
+        for index in rows:
+            np.add(tall, padded[index], out=tall)
+        sums.fill(0)
+        for index in cols:
+            np.add(sums, tall[:, index], out=sums)
+        return (sums // counts).astype(np.uint8)
+    return shrink
+
+
+def _png_chunk(f, kind, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+
+def write_png(path, scanlines):
+    """Write an RGB image given as (height, 1 + width * 3) scanlines to ``path``.
+
+    Each scanline starts with its PNG filter byte (0, none).
+    """
+    height, row_bytes = scanlines.shape
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        _png_chunk(f, b"IHDR", PNG_HEADER.pack((row_bytes - 1) // 3, height, 8, 2, 0, 0, 0))
+        _png_chunk(f, b"IDAT", zlib.compress(scanlines, PNG_LEVEL))
+        _png_chunk(f, b"IEND", b"")
+
+
+class FrameRecorder:
+    """Records captured frames to ``path`` from a background thread.
+
+    ``path`` ending in .rgb or .raw gets a raw RGB24 video; any other
+    path is a directory that gets one PNG per frame. ``scale`` (at most
+    1) downscales the frames as they are written. ``fps`` is only used
+    in the report's ffmpeg hint.
+    """
+
+    def __init__(self, path, scale=1.0, fps=60, buffers=CAPTURE_BUFFERS):
+        if not 0 < scale <= 1:
+            raise ValueError(f"capture scale must be above 0 and at most 1, not {scale}")
+        self.path = path
+        self.raw = path.endswith((".rgb", ".raw"))
+        self.scale = scale
+        self.fps = fps
+        self.buffers = buffers
+        self.ring = None  # Allocated on the first frame, once its size is known
+        self.free = queue.Queue()  # Indices of ring buffers ready for a frame
+        self.ready = queue.Queue()  # (index, frame number) waiting to be written
+        self.thread = None
+        self.file = None
+        self.captured = 0
+        self.dropped = 0
+        self.error = None
+
+    def _start(self, surface):
+        self.frame_size = surface.get_size()
+        width, height = self.frame_size
+        self.offsets = _channel_offsets(surface)
+        if self.offsets is None:
+            # Converted to RGB while capturing instead, which is slower
+            self.ring = np.empty((self.buffers, height, width, 3), dtype=np.uint8)
+        else:
+            self.ring = np.empty((self.buffers, height, width), dtype=np.uint32)
+        for index in range(self.buffers):
+            self.free.put(index)
+        self.size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+        if self.raw:
+            self.file = open(self.path, "wb")
+        else:
+            os.makedirs(self.path, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="frame-writer", daemon=True)
+        self.thread.start()
+
+    def capture(self, surface, wait=False):
+        """Queue a copy of ``surface`` for writing; returns False if it was dropped.
+
+        With ``wait``, waits for the writer instead of dropping frames
+        (for runs not bound to real time, like headless.py).
+        """
+        if self.ring is None:
+            self._start(surface)
+        elif surface.get_size() != self.frame_size:
+            raise ValueError(f"frame size changed from {self.frame_size} to {surface.get_size()}")
+        try:
+            index = self.free.get(block=wait)
+        except queue.Empty:
+            self.dropped += 1  # The writer is behind; don't wait for it
+            return False
+        if self.offsets is None:
+            pixels(surface, self.ring[index])
+        else:
+            np.copyto(self.ring[index], _raw(surface))
+        self.ready.put((index, self.captured))
+        self.captured += 1
+        return True
+
+    def _run(self):
+        width, height = self.frame_size
+        rgb = np.empty((height, width, 3), dtype=np.uint8)
+        shrink = _shrinker(self.frame_size, self.size) if self.size != self.frame_size else None
+        scanlines = None if self.raw else np.zeros((self.size[1], 1 + self.size[0] * 3),
+                                                   dtype=np.uint8)
+        while True:
+            item = self.ready.get()
+            if item is None:
+                return
+            index, number = item
+            if self.offsets is None:
+                rgb[:] = self.ring[index]
+            else:
+                _to_rgb(self.ring[index], self.offsets, rgb)
+            self.free.put(index)  # Everything from here on works on rgb
+            if self.error is not None:
+                continue  # Keep the ring turning; the error is reported on close
+            frame = shrink(rgb) if shrink else rgb
+            try:
+                if self.raw:
+                    self.file.write(frame)
+                else:
+                    scanlines[:, 1:] = frame.reshape(len(frame), -1)
+                    write_png(os.path.join(self.path, f"frame-{number:06d}.png"), scanlines)
+            except OSError as e:
+                self.error = e
+
+    def close(self):
+        """Wait for every queued frame to be written."""
+        if self.thread is not None:
+            self.ready.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def report(self, out=sys.stderr):
+        if self.error is not None:
+            print(f"capture: writing {self.path} failed: {self.error}", file=out)
+            return
+        if self.ring is None:
+            print("capture: no frames captured", file=out)
+            return
+        width, height = self.size
+        print(f"capture: {self.captured} frames of {width}x{height} written to {self.path}, "
+              f"{self.dropped} dropped", file=out)
+        if self.raw:
+            print(f"  encode with: ffmpeg -f rawvideo -pixel_format rgb24 -video_size "
+                  f"{width}x{height} -framerate {self.fps} -i {self.path} capture.mp4", file=out)
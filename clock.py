@@ -0,0 +1,12 @@
+class ManualClock:
+    """Clock that only moves when advanced; the game's simulated time."""
+
+    def __init__(self, start=0):
+        self.ticks = start
+
+    def get_ticks(self):
+        return self.ticks
+
+    def advance(self, ms):
+        self.ticks += ms
+        return self.ticks
@@ -0,0 +1,41 @@
+"""Continuous (swept) collision tests between axis-aligned squares and rects.
+
+Everything moves in a straight line during a tick, so for each pair the
+gap along an axis changes linearly from ``d0`` at the start of the tick
+(t=0) to ``d1`` at the end (t=1). Solving for when the gap is inside the
+overlap range gives the exact time of first contact, however far things
+move in one tick.
+"""
+import numpy as np
+
+
+def overlap_interval(d0, d1, low, high):
+    """Return (enter, exit) times while ``low < d(t) < high`` along one axis.
+
+    ``d(t)`` runs linearly from ``d0`` to ``d1``. Axes with no motion
+    overlap either always (-inf, inf) or never (inf, -inf).
+    """
+    d0 = np.asarray(d0, dtype=float)
+    speed = np.asarray(d1, dtype=float) - d0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_low = (low - d0) / speed
+        t_high = (high - d0) / speed
+    enter = np.minimum(t_low, t_high)
+    exit = np.maximum(t_low, t_high)
+    still = speed == 0
+    inside = (low < d0) & (d0 < high)
+    enter = np.where(still, np.where(inside, -np.inf, np.inf), enter)
+    exit = np.where(still, np.where(inside, np.inf, -np.inf), exit)
+    return enter, exit
+
+
+def first_contact(*intervals):
+    """Combine per-axis (enter, exit) intervals into (hit, time) for this tick.
+
+    ``hit`` is True where the shapes overlap at some time in [0, 1], and
+    ``time`` is the earliest such time (0 if they already overlapped).
+    """
+    enter = np.maximum.reduce([interval[0] for interval in intervals])
+    exit = np.minimum.reduce([interval[1] for interval in intervals])
+    hit = (enter < exit) & (enter < 1) & (exit > 0)
+    return hit, np.maximum(enter, 0.0)
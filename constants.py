@@ -1,8 +1,11 @@
-import pygame
-
-# Screen dimensions
+# Playfield size in world units. Everything in gameplay (positions, sizes,
+# speeds) is in world units, whatever resolution the game is drawn at.
 WIDTH, HEIGHT = 800, 600
 
+# Resolution frames are drawn at, as a fraction of the playfield size; the
+# frame is then scaled to fill the window (see display.py)
+RENDER_SCALE = 1.0
+
 # Colors
 BACKGROUND = (25, 25, 40)
 RED = (220, 60, 60)
@@ -20,19 +23,54 @@ BUTTON_COLOR = (70, 100, 180)
 BUTTON_HOVER = (90, 130, 220)
 ROCKET_COLOR = (255, 100, 100)
 
+# Frame rates while playing and while the window is unfocused
+FPS = 60
+IDLE_FPS = 10
+
+# Simulation ticks per second, independent of the frame rate. Speeds below
+# are in pixels per second, so gameplay is the same at any tick rate.
+TICK_RATE = 60
+TICK_MS = 1000 / TICK_RATE
+# Real time caught up per drawn frame at most, in ms, whatever the tick
+# rate; beyond that the game slows down
+MAX_CATCHUP_MS = 100
+
+# Pixels the player moves per pixel of mouse motion in --relative-mouse mode
+MOUSE_SENSITIVITY = 1.0
+
+# Frames of per-phase timings kept by the frame profiler
+PROFILE_FRAMES = 600
+
+# Frames a capture can fall behind its writer by before frames are dropped
+CAPTURE_BUFFERS = 8
+
+# Garbage collector thresholds while playing (see gc_policy.py): young
+# collections stay about the default size, and full ones only come after
+# 20 million more tracked objects; idle moments collect instead
+GC_THRESHOLDS = (1000, 20, 1000)
+
 # Game constants
 PLAYER_SIZE = 40
+PLAYER_SPEED = 900
 OBSTACLE_MIN_SIZE = 80
 OBSTACLE_MAX_SIZE = 120
-MIN_SPEED = 4
-MAX_SPEED = 8
+MIN_SPEED = 240
+MAX_SPEED = 480
 SPAWN_RATE = 4.5  # obstacles per second
 SCORE_PER_SECOND = 10
 
+# Fewer box/obstacle pairs than this skip the collision broadphase's sweep
+# and are all tested in one pass, which is faster for so few
+SWEEP_MIN_PAIRS = 4096
+
+# Starfield: stars per screen, split across pre-rendered parallax layers
+STAR_DENSITY = 100
+STAR_LAYERS = 3
+
 # Rocket constants
 ROCKET_WIDTH = 10
 ROCKET_HEIGHT = 30
-ROCKET_SPEED = 15
+ROCKET_SPEED = 900
 MAX_ROCKETS = 3
 
 # Difficulty settings
@@ -57,9 +95,12 @@ DIFFICULTIES = {
 # Save file
 SAVE_FILE = "game_save.json"
 
-# Initialize pygame fonts
-pygame.init()
-title_font = pygame.font.SysFont("Arial", 48, bold=True)
-font_large = pygame.font.SysFont("Arial", 32, bold=True)
-font_medium = pygame.font.SysFont("Arial", 24)
-font_small = pygame.font.SysFont("Arial", 18) 
\ No newline at end of file
+# Score history: every finished run, plus the top scores per difficulty
+SCORE_LOG_FILE = "scores.jsonl"
+SCORE_INDEX_FILE = "scores_index.json"
+LEADERBOARD_SIZE = 10
+
+# Fonts (opened on first use, see fonts.py)
+FONT_NAME = "Arial"
+FONT_DIR = "fonts"  # Bundled <name>.ttf / <name>-Bold.ttf skip the system lookup
+FONT_CACHE_FILE = "font_cache.json"
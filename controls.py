@@ -0,0 +1,27 @@
+class TickInput:
+    """Everything the player did during one game tick.
+
+    ``dx``/``dy`` are keyboard directions (-1, 0 or 1), ``mouse`` is the
+    mouse position the player follows this tick (None unless the mouse
+    moved, so a resting mouse doesn't undo keyboard steering), ``fire``
+    fires a rocket and ``pause`` toggles the pause state.
+    """
+    __slots__ = ("dx", "dy", "mouse", "fire", "pause")
+
+    def __init__(self, dx=0, dy=0, mouse=None, fire=False, pause=False):
+        self.dx = dx
+        self.dy = dy
+        self.mouse = mouse
+        self.fire = fire
+        self.pause = pause
+
+    def active(self):
+        """Return True if this tick carries any player input."""
+        return bool(self.dx or self.dy or self.mouse is not None or self.fire or self.pause)
+
+    def __eq__(self, other):
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"TickInput({fields})"
@@ -0,0 +1,92 @@
+"""The window, and the render target every frame is drawn into.
+
+The playfield is WIDTH x HEIGHT world units at any resolution: positions,
+sizes and speeds are all in world units, and only drawing deals in pixels.
+Frames are drawn into a render target ``render_scale`` times the size of
+the playfield, then scaled up (or down) to fill the window.
+"""
+import pygame
+from constants import WIDTH, HEIGHT, RENDER_SCALE
+
+
+def scale_of(surface):
+    """Pixels per world unit when drawing on ``surface``."""
+    return surface.get_height() / HEIGHT
+
+
+def to_pixels(rect, scale):
+    """Scale a rect in world units to pixels."""
+    left, top = round(rect[0] * scale), round(rect[1] * scale)
+    return pygame.Rect(left, top, round((rect[0] + rect[2]) * scale) - left,
+                       round((rect[1] + rect[3]) * scale) - top)
+
+
+def _letterbox(size, bounds):
+    """The largest rect with the aspect ratio of ``size``, centred in ``bounds``."""
+    factor = min(bounds[0] / size[0], bounds[1] / size[1])
+    rect = pygame.Rect(0, 0, round(size[0] * factor), round(size[1] * factor))
+    rect.center = (bounds[0] // 2, bounds[1] // 2)
+    return rect
+
+
+class Display:
+    """Owns the window and the render target the game draws into.
+
+    At render scale 1 in a window, the target is the window itself. Any
+    other size is scaled to fit the window (or the whole screen with
+    ``fullscreen``, keeping the aspect ratio): by SDL on the GPU through
+    pygame.SCALED, or with ``software`` by pygame.transform.scale into a
+    letterboxed area of the window.
+
+    Has the same ``flip``/``update`` interface as pygame.display, so the
+    renderers present through it.
+    """
+
+    def __init__(self, render_scale=RENDER_SCALE, fullscreen=False, software=False):
+        self.size = (max(1, round(WIDTH * render_scale)), max(1, round(HEIGHT * render_scale)))
+        self.scale = self.size[1] / HEIGHT
+        flags = pygame.FULLSCREEN if fullscreen else 0
+        self.window = None  # Only set when scaling in software
+        if self.size == (WIDTH, HEIGHT) and not fullscreen:
+            self.target = pygame.display.set_mode(self.size)
+        elif not software:
+            try:
+                self.target = pygame.display.set_mode(self.size, flags | pygame.SCALED)
+            except pygame.error:
+                software = True  # No renderer that can scale; do it ourselves
+        if software:
+            self.window = pygame.display.set_mode((0, 0) if fullscreen else (WIDTH, HEIGHT),
+                                                  flags)
+            self.area = _letterbox(self.size, self.window.get_size())
+            self.target = pygame.Surface(self.size).convert()
+
+        # World units per pixel of mouse motion; with SCALED, SDL already
+        # reports the mouse in render target pixels
+        if self.window is None:
+            self.mouse_origin = (0, 0)
+            self.mouse_scale = 1 / self.scale
+        else:
+            self.mouse_origin = self.area.topleft
+            self.mouse_scale = HEIGHT / self.area.height
+
+    def to_world(self, pos):
+        """Map a mouse position to whole world units inside the playfield."""
+        x = round((pos[0] - self.mouse_origin[0]) * self.mouse_scale)
+        y = round((pos[1] - self.mouse_origin[1]) * self.mouse_scale)
+        return min(max(x, 0), WIDTH), min(max(y, 0), HEIGHT)
+
+    def to_mouse(self, pos):
+        """Map a position in world units to a mouse position (for set_pos)."""
+        return (round(pos[0] / self.mouse_scale) + self.mouse_origin[0],
+                round(pos[1] / self.mouse_scale) + self.mouse_origin[1])
+
+    def flip(self):
+        if self.window is not None:
+            pygame.transform.scale(self.target, self.area.size, self.window.subsurface(self.area))
+        pygame.display.flip()
+
+    def update(self, rects):
+        if self.window is not None:
+            self.flip()  # The whole target is rescaled anyway
+        else:
+            pygame.display.update(rects)
@@ -0,0 +1,100 @@
+import json
+import os
+import time
+import pygame
+from constants import FONT_NAME, FONT_DIR, FONT_CACHE_FILE
+from storage import atomic_write_json
+
+# Seconds spent opening fonts, reported by main.py --startup-timing
+load_time = 0.0
+
+_paths = None
+
+
+def _cached_paths():
+    global _paths
+    if _paths is None:
+        try:
+            with open(FONT_CACHE_FILE) as f:
+                _paths = json.load(f)
+        except (OSError, ValueError):
+            _paths = {}
+    return _paths
+
+
+def font_path(name, bold=False):
+    """Return (file or None for pygame's default font, whether it is a bold face).
+
+    A font shipped in FONT_DIR wins. Otherwise the system lookup, which
+    scans every installed font, runs once per machine and its result is
+    kept in FONT_CACHE_FILE for later launches.
+    """
+    bundled = os.path.join(FONT_DIR, f"{name}-Bold.ttf" if bold else f"{name}.ttf")
+    if os.path.exists(bundled):
+        return bundled, bold
+
+    paths = _cached_paths()
+    key = f"{name}:{'bold' if bold else 'regular'}"
+    entry = paths.get(key)
+    # A null path means the lookup found nothing last time
+    if isinstance(entry, dict) and (entry["path"] is None or os.path.exists(entry["path"])):
+        return entry["path"], entry["bold"]
+
+    path = pygame.font.match_font(name, bold=bold)
+    # Without a bold face the lookup falls back to the regular one
+    is_bold = bold and path is not None and path != pygame.font.match_font(name)
+    paths[key] = {"path": path, "bold": is_bold}
+    try:
+        atomic_write_json(FONT_CACHE_FILE, paths)
+    except OSError:
+        pass  # Not fatal; the lookup just runs again next launch
+    return path, is_bold
+
+
+class LazyFont:
+    """Stands in for a pygame Font that is only opened when first used."""
+
+    def __init__(self, name, size, bold=False):
+        self.name = name
+        self.point_size = size
+        self.bold = bold
+        self.font = None
+
+    def get(self):
+        global load_time
+        if self.font is None:
+            start = time.perf_counter()
+            if not pygame.font.get_init():
+                pygame.font.init()
+            path, is_bold = font_path(self.name, self.bold)
+            self.font = pygame.font.Font(path, self.point_size)
+            if self.bold and not is_bold:
+                self.font.set_bold(True)  # No bold face found; embolden the regular one
+            load_time += time.perf_counter() - start
+        return self.font
+
+    def render(self, *args):
+        return self.get().render(*args)
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+
+_scaled = {}
+
+
+def scaled(font, scale):
+    """Return ``font`` at ``scale`` times its size, for render targets of other sizes."""
+    if scale == 1:
+        return font
+    size = max(1, round(font.point_size * scale))
+    key = (font.name, size, font.bold)
+    if key not in _scaled:
+        _scaled[key] = LazyFont(font.name, size, font.bold)
+    return _scaled[key]
+
+
+title_font = LazyFont(FONT_NAME, 48, bold=True)
+font_large = LazyFont(FONT_NAME, 32, bold=True)
+font_medium = LazyFont(FONT_NAME, 24)
+font_small = LazyFont(FONT_NAME, 18)
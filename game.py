@@ -1,199 +1,406 @@
 import pygame
+import heapq
 import json
-import os
 import random
+import numpy as np
 from constants import (
-    WIDTH, HEIGHT, BACKGROUND, WHITE, LIGHT_GRAY, RED, YELLOW,
+    HEIGHT, BACKGROUND, WHITE, LIGHT_GRAY, RED, YELLOW,
     SPAWN_RATE, SCORE_PER_SECOND, DIFFICULTIES, SAVE_FILE,
-    title_font, font_large, font_medium, MAX_ROCKETS
+    SCORE_LOG_FILE, SCORE_INDEX_FILE, LEADERBOARD_SIZE,
+    MAX_ROCKETS, TICK_MS, ROCKET_WIDTH, ROCKET_HEIGHT
 )
+from collision import overlap_interval, first_contact
+from display import scale_of
+from fonts import title_font, font_large, font_medium, scaled
 from player import Player
-from obstacle import Obstacle
-from rocket import Rocket
+from obstacle import Obstacle, ObstacleStore
+from rocket import RocketPool
+from spatial import Broadphase
+from text_cache import render_text
+from clock import ManualClock
+from audio import MusicPlayer
+from storage import BackgroundWriter, ScoreHistory
 
 class Game:
-    def __init__(self):
+    def __init__(self, clock=None, audio=None, save_file=SAVE_FILE):
+        # The game runs on simulated time: every step() advances the clock
+        # by tick_ms, however long the tick took in real time. Injectable
+        # clock and audio let the game run headless (see headless.py).
+        self.clock = clock if clock is not None else ManualClock()
+        self.tick_ms = TICK_MS
+        self.audio = audio if audio is not None else MusicPlayer()
+        self.save_file = save_file
+        # Saves go through a background thread so the game loop never
+        # waits on the disk; headless runs (no save file) keep nothing
+        self.writer = None
+        self.scores = None
+        if save_file is not None:
+            self.writer = BackgroundWriter()
+            self.scores = ScoreHistory(SCORE_LOG_FILE, SCORE_INDEX_FILE,
+                                       self.writer, LEADERBOARD_SIZE)
+        self.starfield = None  # Assigned by main(); headless runs skip it
+        self.overlay = None
+        self.session = 0
+        # Replaces the DIFFICULTIES entry when set (see calibrate.py)
+        self.custom_settings = None
+        # Kept for the whole run and reset with each session, so starting
+        # a game allocates nothing new; spent rockets are recycled
+        self.player = Player()
+        self.obstacles = ObstacleStore()
+        self.broadphase = Broadphase()
+        self.rockets = []
+        self.rocket_pool = RocketPool()
         self.reset()
         self.load_settings()
 
-    def reset(self):
-        self.player = Player()
-        self.obstacles = []
+    def reset(self, seed=None):
+        # Every session draws its obstacles from its own seeded RNG so that
+        # it can be replayed exactly (see replay.py)
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.session += 1
+        self.player.reset()
+        self.obstacles.clear()
+        self.broadphase.clear()
+        for rocket in self.rockets:
+            self.rocket_pool.release(rocket)
         self.rockets = []
+        self.next_rocket_id = 0
         self.score = 0
+        self.rank = None  # Leaderboard place of the finished run
         self.game_over = False
         self.paused = False
-        self.last_spawn_time = pygame.time.get_ticks()
-        self.start_time = pygame.time.get_ticks()
-        self.last_rocket_refill = pygame.time.get_ticks()
+        now = self.clock.get_ticks()
+        self.last_spawn_time = now
+        self.start_time = now
+        self.tick_time = now
+        self.last_rocket_refill = now
         self.rockets_available = MAX_ROCKETS
-        try:
-            pygame.mixer.music.load("background_music.mp3")
-            pygame.mixer.music.set_volume(0.5)
-        except:
-            pass
-        pygame.mixer.music.play(-1)  # Loop indefinitely
+        self.audio.play()
         
+    @property
+    def settings(self):
+        """Speed, spawn and rocket refill settings for the current difficulty."""
+        return self.custom_settings or DIFFICULTIES[self.difficulty]
+
     def load_settings(self):
         self.difficulty = "Medium"
         self.high_score = 0
         
         # Try to load from save file
+        if self.save_file is None:
+            return
         try:
-            if os.path.exists(SAVE_FILE):
-                with open(SAVE_FILE, "r") as f:
-                    data = json.load(f)
-                    self.difficulty = data.get("difficulty", "Medium")
-                    self.high_score = data.get("high_score", 0)
-        except:
+            with open(self.save_file, "r") as f:
+                data = json.load(f)
+                self.difficulty = data.get("difficulty", "Medium")
+                self.high_score = data.get("high_score", 0)
+        except (OSError, ValueError, AttributeError):
             pass  # If loading fails, use defaults
         
     def save_settings(self):
+        if self.save_file is None:
+            return
         data = {
             "difficulty": self.difficulty,
             "high_score": self.high_score
         }
-        try:
-            with open(SAVE_FILE, "w") as f:
-                json.dump(data, f)
-        except:
-            pass  # If saving fails, ignore
+        # Written atomically off-thread; rapid saves collapse into one write
+        self.writer.write_json(self.save_file, data)
+
+    def flush(self):
+        """Wait for pending saves to reach the disk."""
+        if self.writer is not None:
+            self.writer.flush()
         
-    def spawn_obstacle(self):
-        current_time = pygame.time.get_ticks()
-        spawn_rate = SPAWN_RATE * DIFFICULTIES[self.difficulty]["spawn_multiplier"]
+    def spawn_obstacle(self, current_time):
+        spawn_rate = SPAWN_RATE * self.settings["spawn_multiplier"]
         
-        if current_time - self.last_spawn_time > 1000 / spawn_rate:
-            self.obstacles.append(Obstacle(self.difficulty))
-            self.last_spawn_time = current_time
+        # The timer moves on by whole intervals, not to this tick, so the
+        # rate doesn't depend on the tick length
+        while current_time - self.last_spawn_time > 1000 / spawn_rate:
+            self.obstacles.add(Obstacle(self.settings, self.rng))
+            self.last_spawn_time += 1000 / spawn_rate
 
     def fire_rocket(self):
         """Fire a rocket from the player's position if available."""
         if self.rockets_available > 0:
             rocket_x = self.player.x + self.player.size // 2 - 5  # Center the rocket
             rocket_y = self.player.y
-            self.rockets.append(Rocket(rocket_x, rocket_y))
+            self.rockets.append(self.rocket_pool.take(rocket_x, rocket_y, self.next_rocket_id))
+            self.next_rocket_id += 1
             self.rockets_available -= 1
 
-    def refill_rockets(self):
+    def refill_rockets(self, current_time):
         """Refill rockets based on difficulty settings."""
-        current_time = pygame.time.get_ticks()
-        refill_time = DIFFICULTIES[self.difficulty]["rocket_refill_time"] * 1000  # Convert to milliseconds
+        refill_time = self.settings["rocket_refill_time"] * 1000  # Convert to milliseconds
         
-        if current_time - self.last_rocket_refill > refill_time:
+        # Whole intervals, like the spawn timer
+        while current_time - self.last_rocket_refill > refill_time:
             if self.rockets_available < MAX_ROCKETS:
                 self.rockets_available += 1
-            self.last_rocket_refill = current_time
+            self.last_rocket_refill += refill_time
             
+    def rocket_hits(self):
+        """Find which rockets hit which obstacles during the last tick.
+
+        Every rocket/obstacle pair from the broadphase is tested with its
+        exact time of first contact, and hits are handed out in time order:
+        each rocket takes the first obstacle it reaches that no other rocket
+        destroyed earlier. Returns ({obstacle index: time}, set of rocket
+        indices used).
+        """
+        store = self.obstacles
+        count = len(self.rockets)
+        if not count or not store.count:
+            return {}, set()
+        x = np.fromiter((rocket.x for rocket in self.rockets), float, count)
+        y0 = np.fromiter((rocket.prev_y for rocket in self.rockets), float, count)
+        y1 = np.fromiter((rocket.y for rocket in self.rockets), float, count)
+
+        # Pair up the rockets and obstacles whose swept areas touch and line up
+        # horizontally (neither moves sideways), then test the pairs in one pass
+        rockets, obstacles = self.broadphase.pairs(x, np.minimum(y0, y1), x + ROCKET_WIDTH,
+                                                   np.maximum(y0, y1) + ROCKET_HEIGHT)
+        gap_x = store.x[obstacles] - x[rockets]
+        lined_up = (gap_x > -store.size[obstacles]) & (gap_x < ROCKET_WIDTH)
+        rockets, obstacles = rockets[lined_up], obstacles[lined_up]
+        if not len(rockets):
+            return {}, set()
+        hit, times = first_contact(overlap_interval(
+            store.prev_y[obstacles] - y0[rockets], store.y[obstacles] - y1[rockets],
+            -store.size[obstacles], ROCKET_HEIGHT))
+        # Pairs come grouped by rocket
+        rockets, obstacles, times = rockets[hit], obstacles[hit], times[hit]
+        firsts = np.flatnonzero(np.diff(rockets, prepend=-1))
+        ends = np.r_[firsts[1:], len(rockets)]
+        targets = {rocket: (obstacles[first:end], times[first:end])
+                   for rocket, first, end in zip(rockets[firsts].tolist(), firsts.tolist(),
+                                                 ends.tolist())}
+
+        gone = np.zeros(store.count, dtype=bool)
+
+        def next_target(rocket):
+            """Queue the first obstacle ``rocket`` reaches that is still there."""
+            candidates, when = targets[rocket]
+            alive = ~gone[candidates]
+            if alive.any():
+                candidates, when = candidates[alive], when[alive]
+                t = when.min()
+                # Indices follow ids, so on ties the older obstacle goes first
+                heapq.heappush(heap, (float(t), rocket, int(candidates[when == t].min())))
+
+        heap = []
+        for rocket in targets:
+            next_target(rocket)
+
+        # Replay the hits in time order; a rocket whose target is already
+        # gone flies on to its next one
+        destroyed = {}
+        used = set()
+        while heap:
+            t, rocket, obstacle = heapq.heappop(heap)
+            if gone[obstacle]:
+                next_target(rocket)
+                continue
+            destroyed[obstacle] = t
+            gone[obstacle] = True
+            used.add(rocket)
+        return destroyed, used
+
+    def player_hit(self, destroyed):
+        """Return True if the player touched an obstacle during the last tick.
+
+        Obstacles a rocket destroyed (``destroyed`` maps index to time)
+        only count if the player reached them first.
+        """
+        player = self.player
+        size = player.size
+        _, obstacles = self.broadphase.pairs([min(player.x, player.prev_x)],
+                                             [min(player.y, player.prev_y)],
+                                             [max(player.x, player.prev_x) + size],
+                                             [max(player.y, player.prev_y) + size])
+        if not len(obstacles):
+            return False
+        store = self.obstacles
+        obstacle_size = store.size[obstacles]
+        gap_x = store.x[obstacles]
+        hit, time = first_contact(
+            overlap_interval(gap_x - player.prev_x, gap_x - player.x, -obstacle_size, size),
+            overlap_interval(store.prev_y[obstacles] - player.prev_y,
+                             store.y[obstacles] - player.y, -obstacle_size, size))
+        gone = np.array([destroyed.get(i, np.inf) for i in obstacles.tolist()])
+        return bool((hit & (time < gone)).any())
+
+    def collide(self):
+        """Run the collision tests for the movement of the last tick.
+
+        Returns (destroyed obstacles, rockets used, whether the player was hit).
+        """
+        self.broadphase.sync(self.obstacles)
+        destroyed, used = self.rocket_hits()
+        return destroyed, used, self.player_hit(destroyed)
+
+    def step(self, tick_input):
+        """Run one fixed-length tick with the given input.
+
+        Time stands still while paused or after game over, so neither
+        counts towards the score.
+        """
+        self.apply_input(tick_input)
+        if not (self.paused or self.game_over):
+            self.clock.advance(self.tick_ms)
+        self.update()
+
+    def apply_input(self, tick_input):
+        """Apply one tick of player input (see controls.TickInput)."""
+        self.player.save_position()
+        if tick_input.pause:
+            self.paused = not self.paused
+        if self.game_over or self.paused:
+            return
+        if tick_input.fire:
+            self.fire_rocket()
+        if tick_input.mouse is not None:
+            self.player.move_to_mouse(tick_input.mouse)
+        self.player.move(tick_input.dx, tick_input.dy, self.tick_ms / 1000)
+
     def update(self):
+        # Sample the clock once so a tick sees a single point in time
+        now = self.tick_time = self.clock.get_ticks()
         if self.game_over or self.paused:
             return
+        seconds = self.tick_ms / 1000
             
         # Update score based on time survived
-        elapsed_seconds = (pygame.time.get_ticks() - self.start_time) / 1000
+        elapsed_seconds = (now - self.start_time) / 1000
         self.score = int(elapsed_seconds * SCORE_PER_SECOND)
         
         # Spawn new obstacles
-        self.spawn_obstacle()
-        
-        # Update rockets
-        for rocket in self.rockets[:]:
-            if rocket.update():
-                self.rockets.remove(rocket)
-                continue
-                
-            # Check rocket collisions with obstacles
-            for obstacle in self.obstacles[:]:
-                if rocket.rect.colliderect(obstacle.rect):
-                    if rocket in self.rockets:
-                        self.rockets.remove(rocket)
-                    if obstacle in self.obstacles:
-                        self.obstacles.remove(obstacle)
-                    break
-        
-        # Update obstacles
-        for obstacle in self.obstacles[:]:
-            if obstacle.update():
-                self.obstacles.remove(obstacle)
-                continue
-                
-            # Check collision with player
-            if self.player.rect.colliderect(obstacle.rect):
-                self.game_over = True
-                if self.score > self.high_score:
-                    self.high_score = self.score
-                    self.save_settings()
+        self.spawn_obstacle(now)
+
+        # Move everything, then test collisions along the paths just taken
+        # so nothing can pass through anything else between ticks
+        offscreen = [rocket.update(seconds) for rocket in self.rockets]
+        self.obstacles.move(seconds)
+        destroyed, used, player_hit = self.collide()
+
+        if destroyed:
+            self.obstacles.remove(list(destroyed))
+        self.obstacles.cull()
+        if used or any(offscreen):
+            rockets = []
+            for i, (rocket, gone) in enumerate(zip(self.rockets, offscreen)):
+                if gone or i in used:
+                    self.rocket_pool.release(rocket)
+                else:
+                    rockets.append(rocket)
+            self.rockets = rockets
+
+        # Check collision with player
+        if player_hit:
+            self.game_over = True
+            self.audio.stop()
+            if self.scores is not None:
+                self.rank = self.scores.add(self.difficulty, self.score)
+            if self.score > self.high_score:
+                self.high_score = self.score
+                self.save_settings()
         
         # Refill rockets
-        self.refill_rockets()
+        self.refill_rockets(now)
                     
-    def draw(self, surface):
-        # Draw starry background
-        surface.fill(BACKGROUND)
-        
-        # Draw stars
-        for star in self.stars:
-            x, y, size, speed = star
-            # Update star position (create parallax effect)
-            y += speed * 0.1
-            if y > HEIGHT:
-                y = 0
-                x = random.randint(0, WIDTH)
-            star[1] = y
-            
-            pygame.draw.circle(surface, WHITE, (int(x), int(y)), size)
-        
+    def clear_background(self, surface, rect=None):
+        surface.fill(BACKGROUND, rect)
+        if self.starfield:
+            self.starfield.draw(surface, rect)
+
+    def draw_overlay(self, surface):
+        """Darken the screen behind the pause and game over messages."""
+        if self.overlay is None or self.overlay.get_size() != surface.get_size():
+            self.overlay = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 180))
+        return surface.blit(self.overlay, (0, 0))
+
+    def draw(self, surface, alpha=1.0, state=None):
+        """Draw the game over a cleared background and return the rects drawn.
+
+        Moving things are drawn ``alpha`` of a tick past their previous
+        positions, so motion stays smooth whatever the frame rate.
+        ``state`` is what to draw in place of this game's own state, such
+        as a GameSnapshot (see pipeline.py).
+        """
+        state = state or self
+        dirty = []
+        if state.paused or state.game_over:
+            alpha = 1.0  # Frozen; show where things actually are
+
+        # Scroll stars (parallax effect); the whole background moves with them
+        seconds = (state.clock.get_ticks() + (alpha - 1) * state.tick_ms) / 1000
+        if self.starfield and self.starfield.scroll(seconds):
+            self.clear_background(surface)
+            dirty.append(surface.get_rect())
+
         # Draw obstacles
-        for obstacle in self.obstacles:
-            obstacle.draw(surface)
+        dirty.extend(state.obstacles.draw(surface, alpha))
             
         # Draw rockets
-        for rocket in self.rockets:
-            rocket.draw(surface)
+        for rocket in state.rockets:
+            dirty.append(rocket.draw(surface, alpha))
             
         # Draw player
-        self.player.draw(surface)
+        dirty.append(state.player.draw(surface, alpha))
         
+        # Text is laid out in world units and drawn at the target's scale
+        scale = scale_of(surface)
+        title, large, medium = (scaled(font, scale) for font in (title_font, font_large, font_medium))
+        width = surface.get_width()
+
+        def centred(text, y):
+            return surface.blit(text, (width // 2 - text.get_width() // 2, round(y * scale)))
+
         # Draw score
-        score_text = font_large.render(f"Score: {self.score}", True, WHITE)
-        surface.blit(score_text, (20, 20))
+        score_text = render_text(large, f"Score: {state.score}", WHITE)
+        dirty.append(surface.blit(score_text, (round(20 * scale), round(20 * scale))))
         
         # Draw high score
-        hs_text = font_medium.render(f"High Score: {self.high_score}", True, LIGHT_GRAY)
-        surface.blit(hs_text, (20, 60))
+        hs_text = render_text(medium, f"High Score: {state.high_score}", LIGHT_GRAY)
+        dirty.append(surface.blit(hs_text, (round(20 * scale), round(60 * scale))))
         
         # Draw difficulty
-        diff_text = font_medium.render(f"Difficulty: {self.difficulty}", True, LIGHT_GRAY)
-        surface.blit(diff_text, (WIDTH - diff_text.get_width() - 20, 20))
+        diff_text = render_text(medium, f"Difficulty: {state.difficulty}", LIGHT_GRAY)
+        dirty.append(surface.blit(diff_text, (width - diff_text.get_width() - round(20 * scale),
+                                              round(20 * scale))))
 
         # Draw rockets available
-        rockets_text = font_medium.render(f"Rockets: {self.rockets_available}", True, WHITE)
-        surface.blit(rockets_text, (20, 100))
+        rockets_text = render_text(medium, f"Rockets: {state.rockets_available}", WHITE)
+        dirty.append(surface.blit(rockets_text, (round(20 * scale), round(100 * scale))))
         
         # Draw game over message
-        if self.game_over:
-            pygame.mixer.music.stop()
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180))
-            surface.blit(overlay, (0, 0))
+        if state.game_over:
+            dirty.append(self.draw_overlay(surface))
             
-            game_over_text = title_font.render("GAME OVER", True, RED)
-            surface.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//2 - 80))
+            game_over_text = render_text(title, "GAME OVER", RED)
+            dirty.append(centred(game_over_text, HEIGHT//2 - 80))
             
-            final_score = font_large.render(f"Final Score: {self.score}", True, WHITE)
-            surface.blit(final_score, (WIDTH//2 - final_score.get_width()//2, HEIGHT//2))
+            final_score = render_text(large, f"Final Score: {state.score}", WHITE)
+            dirty.append(centred(final_score, HEIGHT//2))
             
-            restart_text = font_medium.render("Press SPACE to restart or ESC for menu", True, LIGHT_GRAY)
-            surface.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, HEIGHT//2 + 60))
+            restart_text = render_text(medium, "Press SPACE to restart or ESC for menu", LIGHT_GRAY)
+            dirty.append(centred(restart_text, HEIGHT//2 + 60))
+
+            if state.rank is not None:
+                rank_text = render_text(medium, f"#{state.rank} on the {state.difficulty} leaderboard", YELLOW)
+                dirty.append(centred(rank_text, HEIGHT//2 + 100))
         
         # Draw pause message
-        if self.paused:
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180))
-            surface.blit(overlay, (0, 0))
+        if state.paused:
+            dirty.append(self.draw_overlay(surface))
             
-            pause_text = title_font.render("PAUSED", True, YELLOW)
-            surface.blit(pause_text, (WIDTH//2 - pause_text.get_width()//2, HEIGHT//2 - 40))
+            pause_text = render_text(title, "PAUSED", YELLOW)
+            dirty.append(centred(pause_text, HEIGHT//2 - 40))
             
-            continue_text = font_medium.render("Press P to continue", True, LIGHT_GRAY)
-            surface.blit(continue_text, (WIDTH//2 - continue_text.get_width()//2, HEIGHT//2 + 20)) 
\ No newline at end of file
+            continue_text = render_text(medium, "Press P to continue", LIGHT_GRAY)
+            dirty.append(centred(continue_text, HEIGHT//2 + 20))
+
+        return dirty
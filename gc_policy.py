@@ -0,0 +1,81 @@
+"""Keeping garbage collection pauses out of gameplay.
+
+CPython's cyclic collector runs whenever the number of live GC-tracked
+objects (lists, dicts, class instances, ...) has grown by a threshold,
+wherever in the frame that happens. A full collection walks every tracked
+object, including the thousands made at startup (modules, fonts, sprites)
+that live until exit. Temporaries freed straight away don't count towards
+the thresholds; objects that outlive a frame do.
+
+GCPolicy:
+- freezes everything allocated during startup (gc.freeze), so no
+  collection walks it again
+- sets GC_THRESHOLDS: young collections stay small, full ones are all
+  but switched off during play
+- collects in full when the game goes idle (menu, paused, game over),
+  where a pause can't be seen
+- counts, per frame, the growth in tracked objects and the collections
+  run and their total time, for the frame profiler
+"""
+import gc
+import time
+from constants import GC_THRESHOLDS
+
+
+class GCPolicy:
+    """Garbage collector settings and per-frame counters for the game loop.
+
+    Call ``start`` once startup is done, ``update(idle)`` every frame and
+    ``end_frame`` to take the frame's counters. With ``tune`` off only
+    the counters run, leaving the collector's defaults for comparison.
+    """
+
+    def __init__(self, thresholds=GC_THRESHOLDS, tune=True):
+        self.thresholds = thresholds
+        self.tune = tune
+        self.idle = False
+        # Tracked objects gained this frame, up to the last collection
+        self.allocated = 0
+        self.base = gc.get_count()[0]
+        self.collections = 0
+        self.pause = 0.0  # Seconds spent collecting this frame
+        self.started = None
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            # The young generation's count is reset by the collection
+            self.allocated += gc.get_count()[0] - self.base
+            self.started = time.perf_counter()
+        elif self.started is not None:
+            self.pause += time.perf_counter() - self.started
+            self.collections += 1
+            self.base = gc.get_count()[0]
+            self.started = None
+
+    def start(self):
+        """Freeze what startup made and switch to the tuned thresholds."""
+        if not self.tune:
+            return
+        gc.collect()
+        gc.freeze()
+        gc.set_threshold(*self.thresholds)
+
+    def update(self, idle):
+        """Collect in full on the first frame of an idle spell."""
+        if self.tune and idle and not self.idle:
+            gc.collect()
+        self.idle = idle
+
+    def end_frame(self):
+        """Return the frame's (tracked objects gained, collections, seconds collecting)."""
+        count = gc.get_count()[0]
+        counters = (self.allocated + count - self.base, self.collections, self.pause)
+        self.allocated = 0
+        self.base = count
+        self.collections = 0
+        self.pause = 0.0
+        return counters
+
+    def close(self):
+        gc.callbacks.remove(self._on_gc)
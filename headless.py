@@ -0,0 +1,118 @@
+"""Run Falling Blocks without a window, audio device or wall clock.
+
+Usage: python headless.py [--ticks N] [--difficulty NAME] [--seed N]
+                          [--capture PATH] [--render-scale X]
+"""
+import os
+
+# Must be set before SDL starts up
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import random
+import time
+from clock import ManualClock
+from audio import NullAudio
+from constants import DIFFICULTIES
+from game import Game
+from controls import TickInput
+
+
+def create_game(difficulty="Medium", seed=None):
+    """Create a Game driven by a manual clock, with no audio and no save file."""
+    game = Game(clock=ManualClock(), audio=NullAudio(), save_file=None)
+    game.difficulty = difficulty
+    game.reset(seed)
+    return game
+
+
+def step(game, dx=0, dy=0, fire=False):
+    """Advance the game by one tick with the given input."""
+    game.step(TickInput(dx, dy, fire=fire))
+
+
+def render(game, screen, out=None):
+    """Draw ``game`` into ``screen`` and return its pixels (see capture.pixels).
+
+    ``screen`` needs a display mode set first so sprites can be
+    converted; drawn at a small size, the pixels make cheap observations
+    for bots.
+    """
+    from capture import pixels
+    game.clear_background(screen)
+    game.draw(screen)
+    return pixels(screen, out)
+
+
+def random_policy(game):
+    """Wander randomly and fire now and then."""
+    return random.randint(-1, 1), random.randint(-1, 1), random.random() < 0.02
+
+
+def run(game, ticks, policy=random_policy, on_tick=None):
+    """Step ``game`` until game over or ``ticks`` ticks. Returns ticks run.
+
+    ``on_tick(game)`` is called after every tick.
+    """
+    for i in range(ticks):
+        if game.game_over:
+            return i
+        dx, dy, fire = policy(game)
+        step(game, dx, dy, fire)
+        if on_tick:
+            on_tick(game)
+    return ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Falling Blocks soak run")
+    parser.add_argument("--ticks", type=int, default=100000)
+    parser.add_argument("--difficulty", choices=list(DIFFICULTIES), default="Medium")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--capture", metavar="PATH",
+                        help="draw every tick and record it (see capture.py)")
+    parser.add_argument("--render-scale", type=float, default=1.0,
+                        help="size of the captured frames, as a fraction of 800x600")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    game = create_game(args.difficulty, args.seed)
+    if args.capture:
+        import pygame
+        from capture import FrameRecorder
+        from constants import WIDTH, HEIGHT
+        from display import scale_of
+        from starfield import Starfield
+        pygame.init()
+        screen = pygame.display.set_mode((round(WIDTH * args.render_scale),
+                                          round(HEIGHT * args.render_scale)))
+        game.starfield = Starfield(scale=scale_of(screen))
+        capture = FrameRecorder(args.capture, fps=round(1000 / game.tick_ms))
+
+        def on_tick(game):
+            game.clear_background(screen)
+            game.draw(screen)
+            capture.capture(screen, wait=True)
+    else:
+        on_tick = capture = None
+    games = 1
+    remaining = args.ticks
+    start = time.perf_counter()
+    while remaining > 0:
+        remaining -= run(game, remaining, on_tick=on_tick)
+        if game.game_over and remaining > 0:
+            game.reset(random.randrange(2**32))
+            games += 1
+    if capture:
+        capture.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.ticks} ticks, {games} games, {elapsed:.2f}s "
+          f"({args.ticks / elapsed:.0f} ticks/s)")
+    if capture:
+        capture.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,62 @@
+import time
+
+# Taken before the heavier imports so --startup-timing can include them
+STARTED = time.perf_counter()
+
 import pygame
-import random
-import json
-import os
+import argparse
 import sys
 from pygame.locals import *
-from constants import WIDTH, HEIGHT
+from constants import (
+    WIDTH, HEIGHT, STAR_DENSITY, FPS, TICK_RATE, MAX_CATCHUP_MS, MOUSE_SENSITIVITY,
+    RENDER_SCALE
+)
+from display import Display
 from game import Game
 from menu import Menu
+from renderer import FullRenderer, DirtyRectRenderer
+from starfield import Starfield
+from pacing import FramePacer
+from controls import TickInput
+from replay import SessionRecorder
+from spectate import SpectatorServer
+from profiler import FrameProfiler, LatencyMeter
+from capture import FrameRecorder
+from pipeline import GameSnapshot, SimulationWorker
+from gc_policy import GCPolicy
+import fonts
+
+IMPORTED = time.perf_counter()
 
 def initialize_pygame():
-    """Initialize pygame and its subsystems."""
+    """Initialize pygame and its subsystems.
+
+    This is the only place pygame is initialized; fonts are opened on
+    first use (see fonts.py).
+    """
     pygame.init()
-    pygame.mixer.init()
-
-def create_starfield():
-    """Create the starry background effect."""
-    stars = []
-    for _ in range(100):
-        x = random.randint(0, WIDTH)
-        y = random.randint(0, HEIGHT)
-        size = random.uniform(0.5, 2)
-        speed = random.uniform(0.2, 0.8)
-        stars.append([x, y, size, speed])
-    return stars
-
-def handle_keyboard_input(game, current_screen):
-    """Handle keyboard input for game controls."""
-    if current_screen == "game" and not game.paused and not game.game_over:
+
+def report_startup(marks):
+    """Print how long each startup step took, ending with the first frame."""
+    previous = STARTED
+    for label, when in marks:
+        print(f"{label:<12} {(when - previous) * 1000:8.1f} ms   "
+              f"(at {(when - STARTED) * 1000:8.1f} ms)", file=sys.stderr)
+        previous = when
+    print(f"{'(fonts)':<12} {fonts.load_time * 1000:8.1f} ms   within the first frame",
+          file=sys.stderr)
+
+def sample_input(game, display, current_screen, tick_input, relative_mouse=False):
+    """Sample keyboard and mouse movement into this tick's input.
+
+    Called right before the update so the game sees the freshest state.
+    The mouse only steers on ticks where it moved; otherwise a resting
+    mouse would pull the player back after every keyboard step. Mouse
+    positions are mapped from the window to world units.
+    """
+    # Always read, so motion from the menu or a pause isn't applied later
+    rel = pygame.mouse.get_rel()
+    if current_screen == "game":
         keys = pygame.key.get_pressed()
         dx, dy = 0, 0
         
@@ -42,98 +72,326 @@ def handle_keyboard_input(game, current_screen):
         if keys[K_j] or keys[K_DOWN]:
             dy += 1
         
+        tick_input.dx = dx
+        tick_input.dy = dy
+
         # Mouse movement
-        if pygame.mouse.get_focused():
-            mouse_pos = pygame.mouse.get_pos()
-            game.player.move_to_mouse(mouse_pos)
-        game.player.move(dx, dy)
-
-def handle_events(game, menu, current_screen):
-    """Handle pygame events and return the next screen state."""
-    for event in pygame.event.get():
+        if rel != (0, 0) and pygame.mouse.get_focused():
+            if relative_mouse:
+                # Raw motion steers the player from where it is, adding up
+                # across frames until a tick consumes it
+                if tick_input.mouse is None:
+                    player = game.player
+                    x, y = player.x + player.size // 2, player.y + player.size // 2
+                else:
+                    x, y = tick_input.mouse
+                speed = MOUSE_SENSITIVITY * display.mouse_scale
+                x += round(rel[0] * speed)
+                y += round(rel[1] * speed)
+                # Whole world units, like to_world, so replays can store it
+                tick_input.mouse = (min(max(round(x), 0), WIDTH), min(max(round(y), 0), HEIGHT))
+            else:
+                tick_input.mouse = display.to_world(pygame.mouse.get_pos())
+
+def is_static(game, current_screen):
+    """Return True if nothing on the current screen moves without input."""
+    return current_screen == "menu" or game.paused or game.game_over
+
+def run_ticks(game, ticks, tick_input, recorder=None, stream=None):
+    """Run up to ``ticks`` ticks, stopping early if the game freezes.
+
+    Returns the input carried into the next tick and whether the game
+    froze (paused or ended).
+    """
+    for _ in range(ticks):
+        game.step(tick_input)
+        if recorder:
+            recorder.record(game, tick_input)
+        if stream:
+            stream.publish(game)
+        # Held keys carry on into the next tick; one-off actions don't
+        tick_input = TickInput(tick_input.dx, tick_input.dy)
+        if is_static(game, "game"):
+            return tick_input, True
+    return tick_input, False
+
+def simulate(game, ticks, tick_input, recorder, stream, snapshot, accumulator):
+    """Run ticks like run_ticks, then capture the game into ``snapshot``.
+
+    The --pipeline worker's job; ``accumulator`` is the unsimulated time
+    left after the ticks, which sets the snapshot's alpha.
+    """
+    tick_input, froze = run_ticks(game, ticks, tick_input, recorder, stream)
+    if froze:
+        accumulator = 0.0
+    snapshot.capture(game, accumulator / game.tick_ms)
+    return tick_input, froze
+
+def handle_events(game, menu, display, current_screen, pacer, tick_input, profiler,
+                  relative_mouse=False):
+    """Handle pygame events and return the next screen state.
+
+    Gameplay actions (fire, pause) are collected into ``tick_input`` and
+    stay there until a tick runs.
+    """
+    for event in pacer.events():
         if event.type == QUIT:
             return "quit"
+
+        # Pause instead of playing on in the background
+        if event.type in (pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED):
+            if current_screen == "game" and not game.game_over:
+                if game.paused == tick_input.pause:
+                    tick_input.pause = not tick_input.pause
             
         if event.type == pygame.KEYDOWN:
+            if event.key == K_F3:
+                profiler.toggle_overlay()
+
             if event.key == K_ESCAPE:
                 if current_screen == "game":
                     pygame.event.set_grab(False)
-                    pygame.mixer.music.stop()
+                    game.audio.stop()
                     return "menu"
                 return "quit"
                     
             if event.key == K_p and current_screen == "game":
-                if game.paused:
-                    pygame.mouse.set_pos(game.player.x + game.player.size // 2, 
-                                       game.player.y + game.player.size // 2)
-                game.paused = not game.paused
+                if game.paused and not relative_mouse:
+                    pygame.mouse.set_pos(display.to_mouse((game.player.x + game.player.size // 2,
+                                                           game.player.y + game.player.size // 2)))
+                # Latched until a tick consumes it, which may be frames away
+                # when the frame rate is above the tick rate
+                tick_input.pause = True
                     
             if event.key == K_SPACE:
                 if current_screen == "game" and not game.paused and not game.game_over:
-                    game.fire_rocket()
+                    tick_input.fire = True
                 elif current_screen == "game" and game.game_over:
                     game.reset()
                 
         if event.type == MOUSEBUTTONDOWN:
             if event.button == 1 and current_screen == "game" and not game.paused and not game.game_over:
-                game.fire_rocket()
+                tick_input.fire = True
                 
         if current_screen == "menu":
+            if hasattr(event, "pos"):
+                # Buttons are laid out in world units
+                event = pygame.event.Event(event.type, dict(event.dict, pos=display.to_world(event.pos)))
             result = menu.handle_event(event)
-            if result:
+            if result and result != "menu":
                 if result == "game":
                     game.reset()
-                    pygame.mixer.music.play(-1)
                     pygame.event.set_grab(True)
                 return result
                 
     return current_screen
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Falling Blocks")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only redraw and push changed screen regions")
+    parser.add_argument("--render-scale", type=float, default=RENDER_SCALE,
+                        help="draw at this fraction of 800x600 and scale up to the window")
+    parser.add_argument("--fullscreen", action="store_true",
+                        help="fill the whole screen, keeping the aspect ratio")
+    parser.add_argument("--software-scaling", action="store_true",
+                        help="scale frames with pygame.transform instead of SDL's renderer")
+    parser.add_argument("--star-density", type=int, default=STAR_DENSITY,
+                        help="number of background stars per screen")
+    parser.add_argument("--record", metavar="DIR",
+                        help="save a replay of every game session into DIR")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="record game frames to PATH: raw RGB24 video if it ends in .rgb, "
+                             "otherwise a directory of PNGs")
+    parser.add_argument("--capture-scale", type=float, default=1.0,
+                        help="downscale captured frames by this factor (at most 1)")
+    parser.add_argument("--stream", metavar="ADDRESS",
+                        help="let spectate.py watch on HOST:PORT, PORT or a Unix socket path")
+    parser.add_argument("--profile-out", metavar="FILE",
+                        help="write per-phase frame timings to FILE (.csv or .json) on exit")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="simulate on a worker thread while drawing the previous frame's "
+                             "state (one frame more latency)")
+    parser.add_argument("--default-gc", action="store_true",
+                        help="leave the garbage collector as Python sets it up (still counted "
+                             "in the profiler)")
+    parser.add_argument("--fps", type=int, default=FPS,
+                        help="frame rate cap while playing")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE,
+                        help="simulation ticks per second, independent of --fps")
+    parser.add_argument("--relative-mouse", action="store_true",
+                        help="steer with raw mouse motion instead of following the pointer")
+    parser.add_argument("--input-latency", action="store_true",
+                        help="print input-to-present latency statistics on exit")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="print how long startup took, up to the first menu frame")
+    return parser.parse_args(argv)
+
 def main():
+    args = parse_args()
+
+    startup = [("imports", IMPORTED)]
+
     # Initialize pygame and create window
     initialize_pygame()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    startup.append(("init", time.perf_counter()))
+    display = Display(args.render_scale, args.fullscreen, args.software_scaling)
+    screen = display.target
     pygame.display.set_caption("Falling Squares Game")
+    startup.append(("window", time.perf_counter()))
     
     # Create game objects
-    stars = create_starfield()
     game = Game()
-    game.stars = stars
+    game.tick_ms = 1000 / args.tick_rate
+    game.starfield = Starfield(args.star_density, scale=display.scale)
     menu = Menu(game)
+    startup.append(("game", time.perf_counter()))
     
     # Game loop variables
+    renderer = DirtyRectRenderer(display) if args.dirty_rects else FullRenderer(display)
+    pacer = FramePacer(args.fps)
+    recorder = SessionRecorder(args.record) if args.record else None
+    stream = SpectatorServer(args.stream) if args.stream else None
+    capture = FrameRecorder(args.capture, args.capture_scale, args.fps) if args.capture else None
+    profiler = FrameProfiler()
+    collector = GCPolicy(tune=not args.default_gc)
+    latency = LatencyMeter(frames_behind=1 if args.pipeline else 0)
+    if args.pipeline:
+        worker = SimulationWorker()
+        # The worker captures into back while front is drawn; they swap every frame
+        front, back = GameSnapshot(), GameSnapshot()
+    else:
+        worker = None
     clock = pygame.time.Clock()
     current_screen = "menu"
     running = True
+    # Real time not yet simulated, in ms; always less than one tick after updating
+    accumulator = 0.0
+    live = False  # Whether the game was running (not paused or over) last frame
+    last_frame = time.perf_counter()
+    # Input gathered until the next tick consumes it
+    tick_input = TickInput()
     
     # Main game loop
     while running:
+        profiler.begin_frame()
+        latency.frame_start()
+        if worker and worker.busy:
+            # The game is the main thread's again until the next submit
+            tick_input, froze = worker.finish()
+            if froze:
+                accumulator = 0.0
+            front, back = back, front
+            if ticks:
+                pacer.invalidate()  # Last frame drew an older state
+            profiler.mark("update")
+        now = time.perf_counter()
+        # Time spent in menus, paused or idle doesn't need catching up
+        elapsed_ms = (now - last_frame) * 1000 if live else 0.0
+        last_frame = now
+
         # Handle events
-        current_screen = handle_events(game, menu, current_screen)
+        current_screen = handle_events(game, menu, display, current_screen, pacer, tick_input,
+                                       profiler, args.relative_mouse)
         if current_screen == "quit":
             running = False
             continue
+        profiler.mark("events")
             
-        # Handle keyboard input
-        handle_keyboard_input(game, current_screen)
+        # Sample keyboard and mouse, then update straight away
+        sample_input(game, display, current_screen, tick_input, args.relative_mouse)
+        profiler.mark("input")
         
-        # Update game state
+        # Update game state in fixed ticks, as many as real time calls for
         if current_screen == "game":
-            game.update()
-        
-        # Draw current screen
-        if current_screen == "menu":
-            menu.draw(screen)
+            latency.input_sampled(tick_input)
+            if is_static(game, current_screen):
+                # Frozen; only run a tick to apply input (e.g. unpausing)
+                accumulator = 0.0
+                ticks = 1 if tick_input.active() else 0
+            else:
+                # Past MAX_CATCHUP_MS the game slows down rather than
+                # spending ever longer catching up (at least one tick runs)
+                accumulator = min(accumulator + elapsed_ms, max(MAX_CATCHUP_MS, game.tick_ms))
+                ticks = int(accumulator // game.tick_ms)
+                accumulator -= ticks * game.tick_ms
+            if worker:
+                # Whether the ticks freeze the game isn't known until they've run
+                static = ticks == 0 and is_static(game, current_screen)
+                if stream:
+                    stream.flush(game)  # Before the worker touches the game again
+                if front.session != game.session:
+                    # A new game; show it straight away rather than a frame late
+                    front.capture(game, accumulator / game.tick_ms)
+                worker.submit(simulate, game, ticks, tick_input, recorder, stream, back,
+                              accumulator)
+            else:
+                tick_input, froze = run_ticks(game, ticks, tick_input, recorder, stream)
+                if froze:
+                    accumulator = 0.0
         else:
-            game.draw(screen)
-
+            accumulator = 0.0
+            tick_input = TickInput()
+            if recorder:
+                recorder.finish(game)
+        if stream and not (worker and worker.busy):
+            stream.flush(game)
+        profiler.mark("update")
+        
         # Update cursor visibility
         pygame.mouse.set_visible(current_screen != "game")
 
-        # Update display
-        pygame.display.flip()
-        clock.tick(60)
+        # Draw current screen, unless the last frame is still up to date
+        if not (worker and worker.busy):
+            static = is_static(game, current_screen)
+        live = not static
+        if pacer.should_draw(static):
+            view = menu if current_screen == "menu" else game
+            renderer.begin(screen, view)
+            if view is game:
+                if worker:
+                    # What last frame's ticks left, while the worker runs this frame's
+                    dirty = game.draw(screen, front.alpha, state=front)
+                else:
+                    # Draw between the last two ticks by the unsimulated time
+                    dirty = game.draw(screen, accumulator / game.tick_ms)
+                if capture:
+                    capture.capture(screen)
+            else:
+                dirty = menu.draw(screen)
+            dirty += profiler.draw_overlay(screen)
+            profiler.mark("draw")
+
+            # Update display
+            renderer.present(dirty)
+            pacer.frame_drawn()
+            profiler.mark("present")
+            latency.presented()
+            if startup is not None:
+                startup.append(("first frame", time.perf_counter()))
+                if args.startup_timing:
+                    report_startup(startup)
+                startup = None
+                # Everything made so far lives until exit
+                collector.start()
+        # Collect while nothing moves (menu, paused, game over), not mid-game
+        collector.update(static)
+        pacer.wait(clock, static)
+        profiler.mark("wait")
+        profiler.end_frame(front if worker else game, collector.end_frame())
     
+    if recorder:
+        recorder.finish(game)
+    if stream:
+        stream.close()
+    if capture:
+        capture.close()
+        capture.report()
+    if args.profile_out:
+        profiler.dump(args.profile_out)
+    if args.input_latency:
+        latency.report()
+    game.flush()
     pygame.quit()
     sys.exit()
 
@@ -1,9 +1,11 @@
 import pygame
 from constants import (
-    WIDTH, HEIGHT, MENU_BG, WHITE, LIGHT_GRAY, CYAN, YELLOW,
-    title_font, font_large, font_medium, font_small, DIFFICULTIES
+    WIDTH, HEIGHT, MENU_BG, LIGHT_GRAY, CYAN, YELLOW, DIFFICULTIES
 )
+from display import scale_of
+from fonts import title_font, font_large, font_medium, font_small, scaled
 from button import Button
+from text_cache import render_text
 
 class Menu:
     def __init__(self, game):
@@ -47,29 +49,36 @@ class Menu:
         return "menu"
     
     def quit_game(self):
+        self.game.flush()
         pygame.quit()
         import sys
         sys.exit()
         
+    def clear_background(self, surface, rect=None):
+        surface.fill(MENU_BG, rect)
+        if self.game.starfield:
+            self.game.starfield.draw(surface, rect)
+
     def draw(self, surface):
-        # Draw background
-        surface.fill(MENU_BG)
-        
-        # Draw stars
-        for star in self.game.stars:
-            x, y, size, speed = star
-            pygame.draw.circle(surface, WHITE, (int(x), int(y)), size)
-        
+        """Draw the menu over a cleared background and return the rects drawn."""
+        dirty = []
+        scale = scale_of(surface)
+        width = surface.get_width()
+
+        def centred(text, y):
+            # Layout is in world units, drawn at the target's scale
+            return surface.blit(text, (width // 2 - text.get_width() // 2, round(y * scale)))
+
         # Draw title
-        title_text = title_font.render("FALLING SQUARES", True, CYAN)
-        surface.blit(title_text, (WIDTH//2 - title_text.get_width()//2, 90))
+        title_text = render_text(scaled(title_font, scale), "FALLING SQUARES", CYAN)
+        dirty.append(centred(title_text, 90))
         
-        subtitle_text = font_medium.render("Avoid the falling squares!", True, LIGHT_GRAY)
-        surface.blit(subtitle_text, (WIDTH//2 - subtitle_text.get_width()//2, 150))
+        subtitle_text = render_text(scaled(font_medium, scale), "Avoid the falling squares!", LIGHT_GRAY)
+        dirty.append(centred(subtitle_text, 150))
         
         # Draw high score
-        hs_text = font_large.render(f"High Score: {self.game.high_score}", True, YELLOW)
-        surface.blit(hs_text, (WIDTH//2 - hs_text.get_width()//2, 220))
+        hs_text = render_text(scaled(font_large, scale), f"High Score: {self.game.high_score}", YELLOW)
+        dirty.append(centred(hs_text, 220))
         
         # Draw controls
         controls = [
@@ -80,16 +89,18 @@ class Menu:
         ]
         
         for i, line in enumerate(controls):
-            ctrl_text = font_small.render(line, True, LIGHT_GRAY)
-            surface.blit(ctrl_text, (WIDTH//2 - ctrl_text.get_width()//2, 420 + i*30))
+            ctrl_text = render_text(scaled(font_small, scale), line, LIGHT_GRAY)
+            dirty.append(centred(ctrl_text, 420 + i*30))
         
         # Draw buttons
         for button in self.buttons:
-            button.draw(surface)
+            dirty.append(button.draw(surface))
         
         # Draw footer
-        footer_text = font_small.render("Created with PyGame", True, LIGHT_GRAY)
-        surface.blit(footer_text, (WIDTH//2 - footer_text.get_width()//2, HEIGHT - 40))
+        footer_text = render_text(scaled(font_small, scale), "Created with PyGame", LIGHT_GRAY)
+        dirty.append(centred(footer_text, HEIGHT - 40))
+
+        return dirty
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEMOTION:
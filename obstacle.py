@@ -1,25 +1,143 @@
-import pygame
 import random
-from constants import WIDTH, OBSTACLE_MIN_SIZE, OBSTACLE_MAX_SIZE, MIN_SPEED, MAX_SPEED, DIFFICULTIES, BLUE, GREEN, YELLOW, PURPLE, CYAN, WHITE
+import numpy as np
+from constants import WIDTH, HEIGHT, OBSTACLE_MIN_SIZE, OBSTACLE_MAX_SIZE, MIN_SPEED, MAX_SPEED, DIFFICULTIES, BLUE, GREEN, YELLOW, PURPLE, CYAN
+from display import scale_of
+from sprites import sprites
+
+# Obstacle color palette, stored by index in ObstacleStore
+COLORS = [BLUE, GREEN, YELLOW, PURPLE, CYAN]
 
 class Obstacle:
-    def __init__(self, difficulty="Medium"):
-        self.size = random.randint(OBSTACLE_MIN_SIZE, OBSTACLE_MAX_SIZE)
-        self.x = random.randint(0, WIDTH - self.size)
+    """Randomly rolled parameters for a newly spawned obstacle."""
+    __slots__ = ("size", "x", "y", "speed", "color")
+
+    def __init__(self, difficulty="Medium", rng=random):
+        # ``difficulty`` is a DIFFICULTIES name or a settings dict
+        settings = DIFFICULTIES[difficulty] if isinstance(difficulty, str) else difficulty
+        self.size = rng.randint(OBSTACLE_MIN_SIZE, OBSTACLE_MAX_SIZE)
+        self.x = rng.randint(0, WIDTH - self.size)
         self.y = -self.size
-        self.speed = random.uniform(MIN_SPEED, MAX_SPEED) * DIFFICULTIES[difficulty]["speed_multiplier"]
-        
+        self.speed = rng.uniform(MIN_SPEED, MAX_SPEED) * settings["speed_multiplier"]
+
         # Choose a random color from the palette
-        colors = [BLUE, GREEN, YELLOW, PURPLE, CYAN]
-        self.color = random.choice(colors)
-        
-        self.rect = pygame.Rect(self.x, self.y, self.size, self.size)
-        
-    def update(self):
-        self.y += self.speed
-        self.rect = pygame.Rect(self.x, self.y, self.size, self.size)
-        return self.y > WIDTH
-        
-    def draw(self, surface):
-        pygame.draw.rect(surface, self.color, self.rect)
-        pygame.draw.rect(surface, WHITE, self.rect, 2) 
\ No newline at end of file
+        self.color = rng.choice(COLORS)
+
+
+class ObstacleStore:
+    """All live obstacles, kept as parallel NumPy arrays.
+
+    Movement, culling and collision tests each run as a single vectorized
+    pass instead of a Python loop over per-obstacle objects.
+    """
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.next_id = 0
+        # Ids are assigned in spawn order, so live ids stay sorted
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)  # Before the last update, for drawing
+        self.size = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.color = np.zeros(capacity, dtype=np.int8)
+
+    def __len__(self):
+        return self.count
+
+    def _arrays(self):
+        return (self.ids, self.x, self.y, self.prev_y, self.size, self.speed, self.color)
+
+    def _grow(self):
+        capacity = len(self.x) * 2
+        for name in ("ids", "x", "y", "prev_y", "size", "speed", "color"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, obstacle):
+        self.insert(self.next_id, obstacle.x, obstacle.y, obstacle.size, obstacle.speed,
+                    COLORS.index(obstacle.color))
+
+    def insert(self, obstacle_id, x, y, size, speed, color, prev_y=None):
+        """Append an obstacle with a given id, higher than every live one.
+
+        ``color`` is an index into COLORS. Used by ``add`` and to mirror
+        another game's obstacles (see spectate.py).
+        """
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.ids[i] = obstacle_id
+        self.next_id = max(self.next_id, obstacle_id + 1)
+        self.x[i] = x
+        self.y[i] = y
+        self.prev_y[i] = y if prev_y is None else prev_y
+        self.size[i] = size
+        self.speed[i] = speed
+        self.color[i] = color
+        self.count += 1
+
+    def copy_from(self, other):
+        """Make this store a copy of ``other``, reusing its arrays where they fit."""
+        while len(self.x) < other.count:
+            self._grow()
+        n = other.count
+        for mine, theirs in zip(self._arrays(), other._arrays()):
+            mine[:n] = theirs[:n]
+        self.count = n
+        self.next_id = other.next_id
+
+    def clear(self):
+        """Remove every obstacle and start ids from 0 again, keeping the arrays."""
+        self.count = 0
+        self.next_id = 0
+
+    def remove(self, indices):
+        """Remove obstacles by index (or boolean mask), keeping order."""
+        keep = np.ones(self.count, dtype=bool)
+        keep[indices] = False
+        kept = int(keep.sum())
+        for array in self._arrays():
+            array[:kept] = array[:self.count][keep]
+        self.count = kept
+
+    def move(self, seconds):
+        """Move every obstacle down, remembering where each one started."""
+        n = self.count
+        self.prev_y[:n] = self.y[:n]
+        self.y[:n] += self.speed[:n] * seconds
+
+    def cull(self):
+        """Drop obstacles that are entirely below the screen."""
+        gone = self.y[:self.count] > HEIGHT
+        if gone.any():
+            self.remove(gone)
+
+    def indices_of(self, ids):
+        """Map obstacle ids to current indices, skipping ids no longer live."""
+        live = self.ids[:self.count]
+        ids = np.sort(np.asarray(ids, dtype=np.int64))
+        indices = np.searchsorted(live, ids)
+        found = indices < self.count
+        found[found] = live[indices[found]] == ids[found]
+        return indices[found]
+
+    def draw(self, surface, alpha=1.0):
+        """Draw every obstacle in one blits batch and return the rects drawn.
+
+        Obstacles are drawn ``alpha`` of the way from their previous
+        positions to their current ones.
+        """
+        n = self.count
+        scale = scale_of(surface)
+        xs = (self.x[:n] * scale).astype(int).tolist()
+        prev_y = self.prev_y[:n]
+        ys = ((prev_y + (self.y[:n] - prev_y) * alpha) * scale).astype(int).tolist()
+        sizes = (self.size[:n] * scale).round().astype(int).tolist()
+        colors = self.color[:n].tolist()
+        obstacle_sprite = sprites.obstacle
+        return surface.blits([
+            (obstacle_sprite(size, COLORS[color]), (x, y))
+            for x, y, size, color in zip(xs, ys, sizes, colors)
+        ])
@@ -0,0 +1,63 @@
+import pygame
+from constants import FPS, IDLE_FPS
+
+# Longest time to block waiting for input while the screen is static
+IDLE_WAIT_MS = 250
+
+
+class FramePacer:
+    """Frame pacing that idles when nothing on screen can change.
+
+    When the current screen is static (menu, paused, game over) the last
+    composed frame is kept and the loop blocks until an input event
+    arrives. When the window loses focus or is minimized the loop drops to
+    ``idle_fps``.
+    """
+
+    def __init__(self, fps=FPS, idle_fps=IDLE_FPS):
+        self.fps = fps
+        self.idle_fps = idle_fps
+        self.focused = True
+        self.visible = True
+        self.frame_valid = False
+        self.pending = []
+
+    def events(self):
+        """Return this frame's events, including any received while idle."""
+        events = self.pending + pygame.event.get()
+        self.pending = []
+        for event in events:
+            self.handle_event(event)
+        return events
+
+    def handle_event(self, event):
+        if event.type in (pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED):
+            self.focused = False
+            self.visible = event.type != pygame.WINDOWMINIMIZED
+        elif event.type in (pygame.WINDOWFOCUSGAINED, pygame.WINDOWRESTORED):
+            self.focused = True
+            self.visible = True
+        # Any input may change what is on screen
+        self.invalidate()
+
+    def invalidate(self):
+        self.frame_valid = False
+
+    def should_draw(self, static):
+        if not self.visible:
+            return False
+        return not (static and self.frame_valid)
+
+    def frame_drawn(self):
+        self.frame_valid = True
+
+    def wait(self, clock, static):
+        """Sleep until the next frame is due."""
+        if static and (self.frame_valid or not self.visible):
+            # Nothing will change until input arrives
+            event = pygame.event.wait(IDLE_WAIT_MS)
+            if event.type != pygame.NOEVENT:
+                self.pending.append(event)
+            clock.tick()
+        else:
+            clock.tick(self.fps if self.focused else self.idle_fps)
@@ -0,0 +1,99 @@
+"""Simulating the next ticks on a worker thread while the last ones are drawn.
+
+With main.py --pipeline, each frame hands its ticks to a SimulationWorker
+and draws a GameSnapshot of the game as the previous frame's ticks left
+it. Update and draw overlap, so a heavy frame takes about as long as the
+slower of the two rather than their sum. The cost is one frame of
+latency.
+
+Two snapshots are kept: the worker fills one after its ticks while the
+main thread draws the other, and they swap once the worker is done.
+Between finishing one batch and starting the next, the game is only
+touched by the main thread (events, input, resets).
+"""
+import queue
+import threading
+from clock import ManualClock
+from obstacle import ObstacleStore
+from player import Player
+from rocket import Rocket
+
+
+class GameSnapshot:
+    """A copy of everything Game.draw reads, taken between ticks.
+
+    Draw it with ``game.draw(surface, snapshot.alpha, state=snapshot)``.
+    Captures refill the same arrays and objects, so taking one doesn't
+    allocate once the snapshot has grown to the game's size.
+    """
+
+    def __init__(self):
+        self.obstacles = ObstacleStore()
+        self.player = Player()
+        self.clock = ManualClock()
+        self.rockets = []
+        self.rocket_pool = []
+        self.session = None  # None until the first capture
+        self.alpha = 1.0
+
+    def capture(self, game, alpha):
+        """Copy the state of ``game``, to be drawn ``alpha`` of a tick on."""
+        self.obstacles.copy_from(game.obstacles)
+        while len(self.rocket_pool) < len(game.rockets):
+            self.rocket_pool.append(Rocket(0, 0))
+        self.rockets = self.rocket_pool[:len(game.rockets)]
+        for copy, rocket in zip(self.rockets, game.rockets):
+            copy.x, copy.y, copy.prev_y = rocket.x, rocket.y, rocket.prev_y
+        player = game.player
+        self.player.x, self.player.y = player.x, player.y
+        self.player.prev_x, self.player.prev_y = player.prev_x, player.prev_y
+        self.clock.ticks = game.clock.get_ticks()
+        self.tick_ms = game.tick_ms
+        self.session = game.session
+        self.score = game.score
+        self.high_score = game.high_score
+        self.difficulty = game.difficulty
+        self.rockets_available = game.rockets_available
+        self.rank = game.rank
+        self.paused = game.paused
+        self.game_over = game.game_over
+        self.alpha = alpha
+
+
+class SimulationWorker:
+    """Runs one job at a time on a background thread.
+
+    ``submit`` hands a job over and returns at once; ``finish`` waits for
+    it and returns its result, re-raising anything it raised.
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.busy = False
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def submit(self, job, *args):
+        if self.busy:
+            raise RuntimeError("the previous job hasn't finished")
+        self.busy = True
+        self.jobs.put((job, args))
+
+    def finish(self):
+        """Wait for the submitted job and return its result (None if there is none)."""
+        if not self.busy:
+            return None
+        self.busy = False
+        ok, result = self.results.get()
+        if not ok:
+            raise result
+        return result
+
+    def _run(self):
+        while True:
+            job, args = self.jobs.get()
+            try:
+                self.results.put((True, job(*args)))
+            except BaseException as e:
+                self.results.put((False, e))
@@ -1,33 +1,37 @@
-import pygame
-from constants import WIDTH, HEIGHT, PLAYER_SIZE, PLAYER_COLOR, WHITE
+from constants import WIDTH, HEIGHT, PLAYER_SIZE, PLAYER_SPEED
+from display import scale_of
+from sprites import sprites
 
 class Player:
+    __slots__ = ("x", "y", "size", "speed", "prev_x", "prev_y")
+
     def __init__(self):
+        self.size = PLAYER_SIZE
+        self.speed = PLAYER_SPEED
         self.reset()
         
     def reset(self):
         self.x = WIDTH // 2
         self.y = HEIGHT - 100
-        self.size = PLAYER_SIZE
-        self.speed = 15
-        self.rect = pygame.Rect(self.x, self.y, self.size, self.size)
+        self.save_position()
+
+    def save_position(self):
+        """Remember where the player was before this tick, for interpolation."""
+        self.prev_x = self.x
+        self.prev_y = self.y
         
-    def move(self, dx, dy):
-        self.x = max(0, min(WIDTH - self.size, self.x + dx * self.speed))
-        self.y = max(0, min(HEIGHT - self.size, self.y + dy * self.speed))
-        pygame.mouse.set_pos(self.x + self.size // 2, self.y + self.size // 2)
-        self.rect = pygame.Rect(self.x, self.y, self.size, self.size)
+    def move(self, dx, dy, seconds):
+        step = self.speed * seconds
+        self.x = max(0, min(WIDTH - self.size, self.x + dx * step))
+        self.y = max(0, min(HEIGHT - self.size, self.y + dy * step))
         
     def move_to_mouse(self, pos):
         self.x = max(0, min(WIDTH - self.size, pos[0] - self.size//2))
         self.y = max(0, min(HEIGHT - self.size, pos[1] - self.size//2))
-        self.rect = pygame.Rect(self.x, self.y, self.size, self.size)
-        
-    def draw(self, surface):
-        pygame.draw.rect(surface, PLAYER_COLOR, self.rect)
-        pygame.draw.rect(surface, WHITE, self.rect, 2)
         
-        # Draw player details
-        pygame.draw.rect(surface, (200, 200, 230), 
-                        (self.x + self.size//4, self.y + self.size//4, 
-                         self.size//2, self.size//2)) 
\ No newline at end of file
+    def draw(self, surface, alpha=1.0):
+        """Draw ``alpha`` of the way from the previous position to this one."""
+        scale = scale_of(surface)
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        return surface.blit(sprites.player(scale), (int(x * scale), int(y * scale))) 
\ No newline at end of file
@@ -0,0 +1,165 @@
+import collections
+import csv
+import json
+import statistics
+import sys
+import time
+import numpy as np
+from constants import WHITE, PROFILE_FRAMES
+from display import scale_of
+from fonts import font_small, scaled
+from text_cache import render_text
+
+PHASES = ("events", "input", "update", "draw", "present", "wait")
+# Garbage collector counters per frame (see gc_policy.py)
+GC_COUNTERS = ("gc_objects", "gc_collections", "gc_ms")
+
+# How often the overlay text is refreshed, in seconds
+OVERLAY_INTERVAL = 0.25
+# Frames averaged for the overlay
+OVERLAY_FRAMES = 30
+
+
+class FrameProfiler:
+    """Per-phase timings of the main loop, kept in a fixed-size ring buffer.
+
+    Call ``begin_frame`` at the top of the loop, ``mark(phase)`` at the end
+    of each phase and ``end_frame`` once the frame is done. Each mark
+    charges the time since the previous mark to that phase.
+    """
+
+    def __init__(self, size=PROFILE_FRAMES):
+        self.times = np.zeros((size, len(PHASES)))
+        self.counts = np.zeros((size, 2), dtype=np.int64)  # obstacles, rockets
+        self.gc = np.zeros((size, len(GC_COUNTERS)))
+        self.size = size
+        self.frames = 0
+        self.last = None
+        self.show_overlay = False
+        self.overlay_lines = []
+        self.overlay_updated = 0.0
+
+    def begin_frame(self):
+        self.row = self.frames % self.size
+        self.times[self.row] = 0.0
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.times[self.row, PHASES.index(phase)] += now - self.last
+        self.last = now
+
+    def end_frame(self, game, gc_counters=None):
+        """Finish the frame; ``gc_counters`` comes from GCPolicy.end_frame."""
+        self.counts[self.row] = (len(game.obstacles), len(game.rockets))
+        if gc_counters is not None:
+            objects, collections, seconds = gc_counters
+            self.gc[self.row] = (objects, collections, seconds * 1000)
+        else:
+            self.gc[self.row] = 0.0
+        self.frames += 1
+
+    def recent(self, frames):
+        """Return the (times, counts, gc) rows of the last ``frames`` frames, oldest first."""
+        n = min(frames, self.frames, self.size)
+        rows = np.arange(self.frames - n, self.frames) % self.size
+        return self.times[rows], self.counts[rows], self.gc[rows]
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        self.overlay_updated = 0.0
+
+    def draw_overlay(self, surface):
+        """Draw FPS, per-phase milliseconds, entity counts and GC work. Returns the rects drawn."""
+        if not self.show_overlay or not self.frames:
+            return []
+        now = time.perf_counter()
+        if now - self.overlay_updated >= OVERLAY_INTERVAL:
+            self.overlay_updated = now
+            times, counts, gc = self.recent(OVERLAY_FRAMES)
+            fps = len(times) / max(times.sum(), 1e-9)
+            means = times.mean(axis=0) * 1000
+            self.overlay_lines = [f"FPS {fps:.1f}"]
+            self.overlay_lines += [f"{phase} {ms:.2f} ms" for phase, ms in zip(PHASES, means)]
+            self.overlay_lines.append(f"obstacles {counts[-1][0]}  rockets {counts[-1][1]}")
+            objects, collections, gc_ms = gc.sum(axis=0)
+            self.overlay_lines.append(f"gc {objects / len(gc):+.0f} objects/frame  "
+                                      f"{collections:.0f} runs {gc_ms:.2f} ms")
+
+        dirty = []
+        scale = scale_of(surface)
+        font = scaled(font_small, scale)
+        step = round(20 * scale)
+        y = surface.get_height() - step * len(self.overlay_lines) - round(10 * scale)
+        for line in self.overlay_lines:
+            dirty.append(surface.blit(render_text(font, line, WHITE), (round(10 * scale), y)))
+            y += step
+        return dirty
+
+    def dump(self, path):
+        """Write the buffered frames to ``path`` as CSV, or JSON for a .json path."""
+        times, counts, gc = self.recent(self.size)
+        rows = [
+            dict(frame=self.frames - len(times) + i,
+                 **{f"{phase}_ms": round(ms * 1000, 4) for phase, ms in zip(PHASES, frame_times)},
+                 obstacles=int(frame_counts[0]), rockets=int(frame_counts[1]),
+                 gc_objects=int(frame_gc[0]), gc_collections=int(frame_gc[1]),
+                 gc_ms=round(float(frame_gc[2]), 4))
+            for i, (frame_times, frame_counts, frame_gc) in enumerate(zip(times, counts, gc))
+        ]
+        with open(path, "w", newline="") as f:
+            if path.endswith(".json"):
+                json.dump({"phases": list(PHASES), "frames": rows}, f, indent=1)
+            else:
+                writer = csv.DictWriter(f, fieldnames=["frame"] + [f"{p}_ms" for p in PHASES]
+                                        + ["obstacles", "rockets", *GC_COUNTERS])
+                writer.writeheader()
+                writer.writerows(rows)
+
+
+class LatencyMeter:
+    """Measures how long player input takes to reach the screen.
+
+    Each frame that carries input is timed from the moment its input was
+    sampled to the end of the present. Input that arrived while the loop
+    was sleeping also waited for the sleep to end; pygame events carry no
+    timestamps, so that share is reported as half the mean sleep.
+
+    ``frames_behind`` is how many frames later the input's effect is
+    presented: 1 with main.py --pipeline, which draws the previous frame.
+    """
+
+    def __init__(self, frames_behind=0):
+        self.latencies = []
+        self.sleeps = []
+        self.frames_behind = frames_behind
+        # Sample times (None for frames without input) not yet presented
+        self.samples = collections.deque(maxlen=frames_behind + 1)
+        self.slept_at = None
+
+    def frame_start(self):
+        if self.slept_at is not None:
+            self.sleeps.append(time.perf_counter() - self.slept_at)
+            self.slept_at = None
+
+    def input_sampled(self, tick_input):
+        self.samples.append(time.perf_counter() if tick_input.active() else None)
+
+    def presented(self):
+        now = time.perf_counter()
+        if len(self.samples) > self.frames_behind:
+            sampled_at = self.samples.popleft()
+            if sampled_at is not None:
+                self.latencies.append(now - sampled_at)
+        self.slept_at = now
+
+    def report(self, out=sys.stderr):
+        if not self.latencies:
+            print("input latency: no input frames recorded", file=out)
+            return
+        ms = sorted(t * 1000 for t in self.latencies)
+        queued = statistics.fmean(self.sleeps) * 1000 / 2 if self.sleeps else 0.0
+        print(f"input latency over {len(ms)} frames: sample to present "
+              f"p50 {statistics.median(ms):.2f} ms, p99 {ms[int(len(ms) * 0.99)]:.2f} ms, "
+              f"max {ms[-1]:.2f} ms; plus ~{queued:.2f} ms queued during the frame sleep",
+              file=out)
@@ -0,0 +1,58 @@
+import pygame
+
+
+class FullRenderer:
+    """Clear the whole screen and flip it every frame.
+
+    Frames are presented through ``output``, pygame.display or a
+    display.Display that scales the render target to the window.
+    """
+
+    def __init__(self, output=pygame.display):
+        self.output = output
+
+    def begin(self, surface, screen):
+        screen.clear_background(surface)
+
+    def present(self, rects):
+        self.output.flip()
+
+    def invalidate(self):
+        pass
+
+
+class DirtyRectRenderer:
+    """Only clear and push the regions that changed since the last frame.
+
+    ``screen.draw`` returns the rects it drew this frame. Everything drawn
+    last frame lies inside the previous rects, so clearing just those
+    leaves a clean background, and the display only needs the union of the
+    previous and current rects.
+    """
+
+    def __init__(self, output=pygame.display):
+        self.output = output
+        self.previous = []
+        self.screen = None
+
+    def begin(self, surface, screen):
+        if screen is not self.screen:
+            # New screen (or first frame): start from a full clear
+            self.screen = screen
+            self.previous = None
+        if self.previous is None:
+            screen.clear_background(surface)
+        else:
+            for rect in self.previous:
+                screen.clear_background(surface, rect)
+
+    def present(self, rects):
+        if self.previous is None:
+            self.output.flip()
+        else:
+            self.output.update(self.previous + rects)
+        self.previous = rects
+
+    def invalidate(self):
+        """Force a full clear and flip on the next frame."""
+        self.previous = None
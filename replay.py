@@ -0,0 +1,212 @@
+"""Compact binary input recordings of game sessions, and their playback.
+
+A replay holds the session's RNG seed, difficulty and tick rate, then one
+record per fixed-length game tick: a flags byte (keyboard direction, fire,
+pause and mouse state) followed by the mouse position only when it
+changed. Most ticks take one byte. A footer stores the final score and
+tick count so playback can check determinism.
+
+Usage: python replay.py FILE [FILE ...] [--render] [--speed X]
+"""
+import argparse
+import os
+import struct
+import time
+from controls import TickInput
+
+MAGIC = b"FBRP"
+VERSION = 3  # 1 stored a per-tick time delta; 2 played back with tick-snapped timers
+HEADER = struct.Struct("<4sBIHB")  # magic, version, seed, tick rate, len(difficulty)
+FOOTER = struct.Struct("<II")     # final score, tick count
+MOUSE = struct.Struct("<HH")
+END = 0xFF  # Never a valid flags byte (dx bits are at most 2)
+
+# Mouse states in the top two flag bits
+NO_MOUSE, SAME_MOUSE, NEW_MOUSE = 0, 1, 2
+
+
+class ReplayError(Exception):
+    pass
+
+
+class ReplayWriter:
+    """Encodes one session's ticks into a replay file."""
+
+    def __init__(self, path, seed, difficulty, tick_rate):
+        self.file = open(path, "wb")
+        name = difficulty.encode("ascii")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, tick_rate, len(name)) + name)
+        self.last_mouse = None
+        self.ticks = 0
+        self.buffer = bytearray()
+
+    def write(self, tick_input):
+        flags = (tick_input.dx + 1) | (tick_input.dy + 1) << 2
+        if tick_input.fire:
+            flags |= 1 << 4
+        if tick_input.pause:
+            flags |= 1 << 5
+        mouse = tick_input.mouse
+        if mouse is not None:
+            if any(v != int(v) for v in mouse):
+                # Playback would steer to a rounded position and drift
+                raise ReplayError(f"mouse position {mouse} isn't in whole world units")
+            mouse = tuple(int(v) for v in mouse)
+            flags |= (SAME_MOUSE if mouse == self.last_mouse else NEW_MOUSE) << 6
+
+        self.buffer.append(flags)
+        if flags >> 6 == NEW_MOUSE:
+            self.buffer += MOUSE.pack(*mouse)
+            self.last_mouse = mouse
+        self.ticks += 1
+
+        if len(self.buffer) >= 4096:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def close(self, score=None):
+        """Flush and close; the footer is only written if ``score`` is known."""
+        if score is not None:
+            self.buffer.append(END)
+            self.buffer += FOOTER.pack(score, self.ticks)
+        self.file.write(self.buffer)
+        self.file.close()
+
+
+class SessionRecorder:
+    """Records every game session into its own file in ``directory``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.writer = None
+        self.session = None
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, game, tick_input):
+        """Record the tick the game just ran."""
+        if game.session != self.session:
+            # A new game started; the old one was finished or abandoned
+            self.finish(None)
+            self.session = game.session
+            name = f"session-{time.strftime('%Y%m%d-%H%M%S')}-{game.seed}.fbr"
+            self.writer = ReplayWriter(os.path.join(self.directory, name),
+                                       game.seed, game.difficulty, round(1000 / game.tick_ms))
+        if self.writer is None:
+            return  # Session already finished
+        self.writer.write(tick_input)
+        if game.game_over:
+            self.finish(game)
+
+    def finish(self, game):
+        """Close the current replay (``game`` is None if it was abandoned)."""
+        if self.writer is not None:
+            self.writer.close(game.score if game is not None else None)
+            self.writer = None
+
+
+def read_replay(path):
+    """Return (seed, difficulty, tick rate, [TickInput, ...], footer or None)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, tick_rate, name_len = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ReplayError(f"{path}: not a version {VERSION} replay")
+    pos = HEADER.size
+    difficulty = data[pos:pos + name_len].decode("ascii")
+    pos += name_len
+
+    ticks = []
+    mouse = None
+    while pos < len(data):
+        flags = data[pos]
+        pos += 1
+        if flags == END:
+            return seed, difficulty, tick_rate, ticks, FOOTER.unpack_from(data, pos)
+        mouse_state = flags >> 6
+        if mouse_state == NEW_MOUSE:
+            mouse = MOUSE.unpack_from(data, pos)
+            pos += MOUSE.size
+        tick_input = TickInput(
+            dx=(flags & 3) - 1,
+            dy=(flags >> 2 & 3) - 1,
+            mouse=mouse if mouse_state != NO_MOUSE else None,
+            fire=bool(flags & 1 << 4),
+            pause=bool(flags & 1 << 5),
+        )
+        ticks.append(tick_input)
+    return seed, difficulty, tick_rate, ticks, None  # Truncated (e.g. crashed session)
+
+
+def play(path, screen=None, speed=0):
+    """Re-simulate a replay and return the finished Game.
+
+    With a ``screen`` every tick is drawn to it; ``speed`` scales playback
+    relative to real time, and 0 runs as fast as possible.
+    """
+    # Imported here so the caller can pick SDL drivers before pygame starts
+    import pygame
+    from audio import NullAudio
+    from clock import ManualClock
+    from game import Game
+
+    seed, difficulty, tick_rate, ticks, _ = read_replay(path)
+    game = Game(clock=ManualClock(), audio=NullAudio(), save_file=None)
+    game.tick_ms = 1000 / tick_rate
+    game.difficulty = difficulty
+    game.reset(seed)
+    if screen is not None:
+        from starfield import Starfield
+        game.starfield = Starfield()
+
+    start = time.perf_counter()
+    for i, tick_input in enumerate(ticks, 1):
+        game.step(tick_input)
+        if screen is not None:
+            game.clear_background(screen)
+            game.draw(screen)
+            pygame.display.flip()
+            pygame.event.pump()
+            if speed:
+                delay = i * game.tick_ms / 1000 / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back Falling Blocks replays")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--render", action="store_true", help="draw the replay in a window")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="playback speed when rendering (0 = unthrottled)")
+    args = parser.parse_args()
+
+    if not args.render:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    from constants import WIDTH, HEIGHT
+
+    screen = None
+    if args.render:
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Falling Squares Replay")
+
+    mismatches = 0
+    for path in args.files:
+        _, _, _, ticks, footer = read_replay(path)
+        start = time.perf_counter()
+        game = play(path, screen, args.speed)
+        elapsed = time.perf_counter() - start
+
+        # The footer is missing if the recording was cut short
+        ok = footer is None or footer == (game.score, len(ticks))
+        mismatches += not ok
+        status = "ok" if ok else f"MISMATCH, recorded {footer[0]}"
+        print(f"{path}: {len(ticks)} ticks, score {game.score} ({status}), "
+              f"{len(ticks) / max(elapsed, 1e-9):.0f} ticks/s")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,51 @@
-import pygame
-from constants import ROCKET_WIDTH, ROCKET_HEIGHT, ROCKET_SPEED, ROCKET_COLOR, WHITE
+from constants import ROCKET_WIDTH, ROCKET_HEIGHT, ROCKET_SPEED
+from display import scale_of
+from sprites import sprites, ROCKET_SPRITE_OFFSET
 
 class Rocket:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
+    # No per-instance dict, and rockets are recycled (see RocketPool)
+    __slots__ = ("id", "x", "y", "width", "height", "speed", "prev_y")
+
+    def __init__(self, x, y, rocket_id=None):
         self.width = ROCKET_WIDTH
         self.height = ROCKET_HEIGHT
         self.speed = ROCKET_SPEED
-        self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.reset(x, y, rocket_id)
+
+    def reset(self, x, y, rocket_id=None):
+        """Launch (or relaunch) the rocket from ``(x, y)``."""
+        self.id = rocket_id  # Assigned by the game in firing order
+        self.x = x
+        self.y = y
+        self.prev_y = y
         
-    def update(self):
+    def update(self, seconds):
         """Update rocket position and return True if rocket is off screen."""
-        self.y -= self.speed
-        self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
+        self.prev_y = self.y
+        self.y -= self.speed * seconds
         return self.y + self.height < 0
         
-    def draw(self, surface):
-        """Draw the rocket on the surface."""
-        # Draw rocket body
-        pygame.draw.rect(surface, ROCKET_COLOR, self.rect)
-        pygame.draw.rect(surface, WHITE, self.rect, 2)
-        
-        # Draw rocket flame
-        flame_points = [
-            (self.x, self.y + self.height),
-            (self.x - 5, self.y + self.height + 10),
-            (self.x + self.width + 5, self.y + self.height + 10)
-        ]
-        pygame.draw.polygon(surface, (255, 200, 100), flame_points)
-        pygame.draw.polygon(surface, WHITE, flame_points, 1)
-        
-    
\ No newline at end of file
+    def draw(self, surface, alpha=1.0):
+        """Draw the rocket (with its flame) and return the rect drawn."""
+        scale = scale_of(surface)
+        dx, dy = ROCKET_SPRITE_OFFSET
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        return surface.blit(sprites.rocket(scale),
+                            (int((self.x + dx) * scale), int((y + dy) * scale)))
+
+
+class RocketPool:
+    """A free list of spent rockets, so firing doesn't allocate."""
+
+    def __init__(self):
+        self.free = []
+
+    def take(self, x, y, rocket_id=None):
+        if self.free:
+            rocket = self.free.pop()
+            rocket.reset(x, y, rocket_id)
+            return rocket
+        return Rocket(x, y, rocket_id)
+
+    def release(self, rocket):
+        self.free.append(rocket)
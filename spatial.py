@@ -0,0 +1,78 @@
+import numpy as np
+from constants import SWEEP_MIN_PAIRS
+
+
+class Broadphase:
+    """Sort-and-sweep broadphase over the obstacles in an ObstacleStore.
+
+    Nothing moves sideways, so one axis is enough: ``sync`` takes the area
+    each obstacle swept during the last tick (from its previous to its
+    current position), and ``pairs`` sorts the areas by left edge, then
+    finds the obstacles that can reach across each box with two binary
+    searches and only tests those. The sort is kept until the next sync.
+    Obstacle indices are only valid until the store next changes, so sync
+    first.
+
+    Below ``min_pairs`` box/obstacle pairs, every box is tested against
+    every obstacle in one pass instead, with no sort: at the usual few
+    rockets and a screenful of obstacles, that takes fewer NumPy calls
+    than the sweep.
+    """
+    def __init__(self, min_pairs=SWEEP_MIN_PAIRS):
+        self.min_pairs = min_pairs
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.bounds = (np.zeros(0),) * 4  # Swept left, top, right, bottom per obstacle
+        self.swept = None  # (order by left edge, bounds in that order, widest), once sorted
+
+    def sync(self, store):
+        """Take the swept areas of the obstacles in ``store`` as they are now."""
+        n = store.count
+        x = store.x[:n]
+        size = store.size[:n]
+        y0 = store.prev_y[:n]
+        y1 = store.y[:n]
+        self.count = n
+        self.bounds = (x, np.minimum(y0, y1), x + size, np.maximum(y0, y1) + size)
+        self.swept = None
+
+    def sorted_bounds(self):
+        """Return the obstacle order by left edge, the bounds in that order and the widest obstacle."""
+        if self.swept is None:
+            left, top, right, bottom = self.bounds
+            order = np.argsort(left, kind="stable")
+            widest = (right - left).max() if self.count else 0.0
+            self.swept = (order, (left[order], top[order], right[order], bottom[order]), widest)
+        return self.swept
+
+    def pairs(self, left, top, right, bottom):
+        """Pair boxes, given as arrays of edges, with the obstacles whose swept areas they touch.
+
+        Returns (box indices, obstacle indices), grouped by box. Touching
+        counts; the exact tests that follow decide.
+        """
+        left, top, right, bottom = (np.asarray(edge, dtype=float)
+                                    for edge in (left, top, right, bottom))
+        if len(left) * self.count < self.min_pairs:
+            obstacle_left, obstacle_top, obstacle_right, obstacle_bottom = self.bounds
+            return np.nonzero((obstacle_left <= right[:, None]) &
+                              (obstacle_right >= left[:, None]) &
+                              (obstacle_top <= bottom[:, None]) &
+                              (obstacle_bottom >= top[:, None]))
+
+        order, (obstacle_left, obstacle_top, obstacle_right, obstacle_bottom), widest = \
+            self.sorted_bounds()
+        # Only obstacles starting at most one obstacle width left of a box
+        # can reach it
+        first = np.searchsorted(obstacle_left, left - widest, "left")
+        counts = np.searchsorted(obstacle_left, right, "right") - first
+        entries = np.arange(counts.sum()) + np.repeat(first - (np.cumsum(counts) - counts), counts)
+        # Heights overlap least often, so test them first
+        near = ((obstacle_top[entries] <= np.repeat(bottom, counts)) &
+                (obstacle_bottom[entries] >= np.repeat(top, counts)))
+        entries = entries[near]
+        boxes = np.repeat(np.arange(len(left)), counts)[near]
+        reach = obstacle_right[entries] >= left[boxes]
+        return boxes[reach], order[entries[reach]]
@@ -0,0 +1,408 @@
+"""Live spectating: a game publishes its state every tick and viewers draw it.
+
+The game listens on a local TCP port or Unix socket and sends every
+viewer the same stream of length-prefixed messages. A viewer first gets
+a keyframe holding the whole state, then one delta per tick. Entities
+are keyed by id, and obstacles and rockets move at constant speeds, so a
+delta only carries what can't be worked out: entities that appeared
+(with their full state) or disappeared, the player position and the
+HUD values, each only if it changed. The viewer moves everything else
+with the same code the game does, which keeps it exact. Most deltas are
+a few bytes, and each tick is encoded once however many viewers there
+are.
+
+Usage: python spectate.py ADDRESS [--render-scale X] [--fps N]
+ADDRESS is HOST:PORT, PORT, or the path of a Unix socket.
+"""
+import argparse
+import os
+import socket
+import stat
+import struct
+import time
+import numpy as np
+from obstacle import ObstacleStore
+from rocket import Rocket
+
+MAGIC = b"FBSP"
+VERSION = 1
+LENGTH = struct.Struct("<I")            # every message is prefixed by its length
+KEY_HEADER = struct.Struct("<4sBdB")    # magic, version, tick ms, len(difficulty)
+PLAYER = struct.Struct("<dd")           # player x, y
+STATUS = struct.Struct("<IIBBB")        # score, high score, rockets left, state, rank (0 = none)
+COUNT = struct.Struct("<H")
+
+OBSTACLE = np.dtype([("id", "<u4"), ("x", "<u2"), ("size", "<u2"), ("color", "u1"),
+                     ("y", "<f8"), ("prev_y", "<f8"), ("speed", "<f8")])
+ROCKET = np.dtype([("id", "<u4"), ("x", "<f8"), ("y", "<f8"), ("prev_y", "<f8")])
+IDS = np.dtype("<u4")
+
+# Message kinds; a message is its kind, a KEY_HEADER for keyframes, its
+# section flags, then the sections
+KEY, DELTA = 1, 2
+
+# Section flags; the sections that follow appear in this order
+MOVED = 1                 # the world advanced one tick (no payload)
+PLAYER_MOVED = 2
+STATUS_CHANGED = 4
+OBSTACLES_REMOVED = 8
+ROCKETS_REMOVED = 16
+OBSTACLES_ADDED = 32
+ROCKETS_ADDED = 64
+
+# State flags in STATUS
+PAUSED, GAME_OVER = 1, 2
+
+# Unsent bytes a viewer may fall behind by before it is dropped
+MAX_BACKLOG = 1 << 20
+
+
+class SpectateError(Exception):
+    pass
+
+
+def _status(game):
+    state = (PAUSED if game.paused else 0) | (GAME_OVER if game.game_over else 0)
+    return (game.score, game.high_score, game.rockets_available, state, game.rank or 0)
+
+
+def _obstacles(store, start=0):
+    n = store.count
+    records = np.empty(n - start, OBSTACLE)
+    for name in OBSTACLE.names:
+        records[name] = getattr(store, "ids" if name == "id" else name)[start:n]
+    return records
+
+
+def _rockets(rockets):
+    return np.array([(rocket.id, rocket.x, rocket.y, rocket.prev_y) for rocket in rockets],
+                    ROCKET)
+
+
+def _section(records):
+    return COUNT.pack(len(records)) + records.tobytes()
+
+
+class StateEncoder:
+    """Encodes a game's state after each tick as keyframes and deltas.
+
+    Remembers what it last encoded, so each delta only holds the changes.
+    """
+
+    def __init__(self):
+        self.session = None  # None until the first keyframe
+
+    def keyframe(self, game):
+        """Encode the whole current state."""
+        name = game.difficulty.encode("ascii")
+        parts = [bytes([KEY]), KEY_HEADER.pack(MAGIC, VERSION, game.tick_ms, len(name)), name,
+                 bytes([PLAYER_MOVED | STATUS_CHANGED | OBSTACLES_ADDED | ROCKETS_ADDED]),
+                 # The previous position too, to interpolate the first tick
+                 PLAYER.pack(game.player.prev_x, game.player.prev_y),
+                 PLAYER.pack(game.player.x, game.player.y), STATUS.pack(*_status(game)),
+                 _section(_obstacles(game.obstacles)), _section(_rockets(game.rockets))]
+        self._remember(game)
+        return b"".join(parts)
+
+    def encode(self, game):
+        """Encode the tick ``game`` just ran; a keyframe if its session is new."""
+        if game.session != self.session:
+            return self.keyframe(game)
+        flags = 0
+        parts = []
+        if game.tick_time != self.tick_time:
+            flags |= MOVED
+        player = (game.player.x, game.player.y)
+        if player != self.player:
+            flags |= PLAYER_MOVED
+            parts.append(PLAYER.pack(*player))
+        status = _status(game)
+        if status != self.status:
+            flags |= STATUS_CHANGED
+            parts.append(STATUS.pack(*status))
+
+        store = game.obstacles
+        ids = store.ids[:store.count]
+        removed = self.obstacle_ids[~np.isin(self.obstacle_ids, ids, assume_unique=True)]
+        if len(removed):
+            flags |= OBSTACLES_REMOVED
+            parts.append(_section(removed.astype(IDS)))
+        rocket_ids = [rocket.id for rocket in game.rockets]
+        gone = set(self.rocket_ids).difference(rocket_ids)
+        if gone:
+            flags |= ROCKETS_REMOVED
+            parts.append(_section(np.array(sorted(gone), IDS)))
+        # Ids are handed out in order, so anything new has a higher id
+        start = int(np.searchsorted(ids, self.next_obstacle_id))
+        if start < store.count:
+            flags |= OBSTACLES_ADDED
+            parts.append(_section(_obstacles(store, start)))
+        added = [rocket for rocket in game.rockets if rocket.id >= self.next_rocket_id]
+        if added:
+            flags |= ROCKETS_ADDED
+            parts.append(_section(_rockets(added)))
+
+        self._remember(game)
+        return bytes([DELTA, flags]) + b"".join(parts)
+
+    def _remember(self, game):
+        store = game.obstacles
+        self.session = game.session
+        self.tick_time = game.tick_time
+        self.player = (game.player.x, game.player.y)
+        self.status = _status(game)
+        self.obstacle_ids = store.ids[:store.count].copy()
+        self.next_obstacle_id = store.next_id
+        self.rocket_ids = [rocket.id for rocket in game.rockets]
+        self.next_rocket_id = game.next_rocket_id
+
+
+class StateDecoder:
+    """Applies a spectator stream to a local Game, which then draws it as usual."""
+
+    def __init__(self, game):
+        self.game = game
+        self.buffer = bytearray()
+        self.synced = False  # Deltas mean nothing before the first keyframe
+
+    def feed(self, data):
+        """Apply every complete message in the stream so far; returns how many ticks."""
+        self.buffer += data
+        ticks = 0
+        pos = 0
+        while len(self.buffer) - pos >= LENGTH.size:
+            (length,) = LENGTH.unpack_from(self.buffer, pos)
+            end = pos + LENGTH.size + length
+            if end > len(self.buffer):
+                break
+            ticks += self.apply(memoryview(self.buffer)[pos + LENGTH.size:end])
+            pos = end
+        del self.buffer[:pos]
+        return ticks
+
+    def apply(self, message):
+        """Apply one message; returns 1 if it was a tick."""
+        game = self.game
+        kind = message[0]
+        pos = 1
+        if kind == KEY:
+            magic, version, tick_ms, name_length = KEY_HEADER.unpack_from(message, pos)
+            if magic != MAGIC or version != VERSION:
+                raise SpectateError(f"not a version {VERSION} spectator stream")
+            pos += KEY_HEADER.size
+            game.difficulty = bytes(message[pos:pos + name_length]).decode("ascii")
+            game.tick_ms = tick_ms
+            pos += name_length
+            game.obstacles = ObstacleStore()
+            game.rockets = []
+            self.synced = True
+        elif not self.synced:
+            return 0
+        flags = message[pos]
+        pos += 1
+
+        player = game.player
+        player.save_position()
+        if flags & MOVED:
+            seconds = game.tick_ms / 1000
+            game.clock.advance(game.tick_ms)
+            game.obstacles.move(seconds)
+            for rocket in game.rockets:
+                rocket.update(seconds)
+        if kind == KEY:
+            player.prev_x, player.prev_y = PLAYER.unpack_from(message, pos)
+            pos += PLAYER.size
+        if flags & PLAYER_MOVED:
+            player.x, player.y = PLAYER.unpack_from(message, pos)
+            pos += PLAYER.size
+        if flags & STATUS_CHANGED:
+            (game.score, game.high_score, game.rockets_available,
+             state, rank) = STATUS.unpack_from(message, pos)
+            game.paused = bool(state & PAUSED)
+            game.game_over = bool(state & GAME_OVER)
+            game.rank = rank or None
+            pos += STATUS.size
+        if flags & OBSTACLES_REMOVED:
+            ids, pos = self._records(message, pos, IDS)
+            game.obstacles.remove(game.obstacles.indices_of(ids))
+        if flags & ROCKETS_REMOVED:
+            ids, pos = self._records(message, pos, IDS)
+            gone = set(ids.tolist())
+            game.rockets = [rocket for rocket in game.rockets if rocket.id not in gone]
+        if flags & OBSTACLES_ADDED:
+            records, pos = self._records(message, pos, OBSTACLE)
+            for obstacle_id, x, size, color, y, prev_y, speed in records.tolist():
+                game.obstacles.insert(obstacle_id, x, y, size, speed, color, prev_y)
+        if flags & ROCKETS_ADDED:
+            records, pos = self._records(message, pos, ROCKET)
+            for rocket_id, x, y, prev_y in records.tolist():
+                rocket = Rocket(x, y, rocket_id)
+                rocket.prev_y = prev_y
+                game.rockets.append(rocket)
+        return int(kind == DELTA)
+
+    @staticmethod
+    def _records(message, pos, dtype):
+        (count,) = COUNT.unpack_from(message, pos)
+        pos += COUNT.size
+        records = np.frombuffer(message, dtype, count, pos)
+        return records, pos + count * dtype.itemsize
+
+
+def parse_address(address):
+    """Return (socket family, address) for HOST:PORT, PORT or a Unix socket path."""
+    if os.sep in address or address.endswith(".sock"):
+        return socket.AF_UNIX, address
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class SpectatorServer:
+    """Publishes a game to any number of viewers connecting on ``address``.
+
+    Each tick is encoded once and the same bytes go to every viewer;
+    viewers that join get a keyframe first. Sockets never block: a viewer
+    that can't keep up queues its unsent data, and is dropped once that
+    passes MAX_BACKLOG bytes, so no viewer can hold up the game.
+    """
+
+    def __init__(self, address):
+        family, self.address = parse_address(address)
+        if family == socket.AF_UNIX and os.path.exists(self.address):
+            if not stat.S_ISSOCK(os.stat(self.address).st_mode):
+                raise SpectateError(f"{self.address} exists and is not a socket")
+            os.unlink(self.address)  # Left behind by an earlier run
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(self.address)
+        self.listener.listen()
+        self.listener.setblocking(False)
+        self.family = family
+        self.encoder = StateEncoder()
+        self.viewers = {}  # socket -> bytearray of data it hasn't taken yet
+        self.pending = bytearray()  # Ticks published since the last flush
+
+    def _frame(self, message):
+        return LENGTH.pack(len(message)) + message
+
+    def publish(self, game):
+        """Encode the tick ``game`` just ran (call after every tick)."""
+        if self.viewers:
+            self.pending += self._frame(self.encoder.encode(game))
+        # With nobody watching nothing is encoded; the next viewer to join
+        # gets a keyframe
+
+    def flush(self, game):
+        """Let new viewers in and send out what was published (call once per frame)."""
+        joined = []
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                break
+            connection.setblocking(False)
+            if self.family == socket.AF_INET:
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            joined.append(connection)
+        # A game restarted since the last tick leaves everyone needing a
+        # keyframe; otherwise only newcomers do
+        restarted = game.session != self.encoder.session
+        if joined or (restarted and self.viewers):
+            key = self._frame(self.encoder.keyframe(game))
+            if restarted:
+                self.pending += key
+
+        for backlog in self.viewers.values():
+            backlog += self.pending
+        self.pending.clear()
+        for connection in joined:
+            self.viewers[connection] = bytearray(key)
+
+        for viewer, backlog in list(self.viewers.items()):
+            if not backlog:
+                continue
+            try:
+                sent = viewer.send(backlog)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError:
+                self._drop(viewer)  # Viewer went away
+                continue
+            del backlog[:sent]
+            if len(backlog) > MAX_BACKLOG:
+                self._drop(viewer)
+
+    def _drop(self, viewer):
+        del self.viewers[viewer]
+        viewer.close()
+
+    def close(self):
+        for viewer in list(self.viewers):
+            self._drop(viewer)
+        self.listener.close()
+        if self.family == socket.AF_UNIX:
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+
+
+def watch(address, render_scale, fps):
+    """Connect to a game at ``address`` and draw it until it ends or the window closes."""
+    import pygame
+    from audio import NullAudio
+    from display import Display
+    from game import Game
+    from starfield import Starfield
+
+    family, target = parse_address(address)
+    connection = socket.socket(family, socket.SOCK_STREAM)
+    connection.connect(target)
+    connection.setblocking(False)
+
+    pygame.init()
+    display = Display(render_scale)
+    pygame.display.set_caption("Falling Squares Spectator")
+    screen = display.target
+    game = Game(audio=NullAudio(), save_file=None)
+    game.starfield = Starfield(scale=display.scale)
+    decoder = StateDecoder(game)
+    clock = pygame.time.Clock()
+    last_tick = time.perf_counter()
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN
+                                             and event.key == pygame.K_ESCAPE):
+                return
+        try:
+            while True:
+                data = connection.recv(1 << 16)
+                if not data:
+                    print("The game stopped streaming")
+                    return
+                if decoder.feed(data):
+                    last_tick = time.perf_counter()
+        except (BlockingIOError, InterruptedError):
+            pass
+
+        # Glide from the previous tick to the latest over one tick's time
+        alpha = min((time.perf_counter() - last_tick) * 1000 / game.tick_ms, 1.0)
+        game.clear_background(screen)
+        game.draw(screen, alpha)
+        display.flip()
+        clock.tick(fps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a Falling Blocks game streamed with --stream")
+    parser.add_argument("address", help="HOST:PORT, PORT or a Unix socket path")
+    parser.add_argument("--render-scale", type=float, default=1.0)
+    parser.add_argument("--fps", type=int, default=60)
+    args = parser.parse_args()
+    watch(args.address, args.render_scale, args.fps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import pygame
+from constants import (
+    PLAYER_SIZE, PLAYER_COLOR, ROCKET_WIDTH, ROCKET_HEIGHT, ROCKET_COLOR, WHITE
+)
+
+# Transparent color for sprites with empty corners (the rocket flame)
+COLORKEY = (255, 0, 255)
+
+# Rocket sprites extend past the rocket's rect to fit the flame
+ROCKET_SPRITE_OFFSET = (-5, 0)
+
+
+def _finish(surface, scale=1.0):
+    """Scale from world units to pixels, then convert to the display format
+    once a display exists, for fast blits."""
+    if scale != 1:
+        w, h = surface.get_size()
+        surface = pygame.transform.scale(surface, (max(1, round(w * scale)),
+                                                   max(1, round(h * scale))))
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert()
+
+
+class SpriteCache:
+    """Pre-rendered surfaces for obstacles, rockets and the player.
+
+    Sprites are drawn on first use with the same primitives the entities
+    used to issue every frame, so each entity becomes a single blit.
+    Obstacle sizes are in pixels; rockets and the player are drawn in world
+    units and scaled by ``scale`` pixels per unit.
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def obstacle(self, size, color):
+        key = ("obstacle", size, color)
+        sprite = self.surfaces.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((size, size))
+            rect = sprite.get_rect()
+            pygame.draw.rect(sprite, color, rect)
+            pygame.draw.rect(sprite, WHITE, rect, 2)
+            sprite = self.surfaces[key] = _finish(sprite)
+        return sprite
+
+    def rocket(self, scale=1.0):
+        key = ("rocket", scale)
+        sprite = self.surfaces.get(key)
+        if sprite is None:
+            w, h = ROCKET_WIDTH, ROCKET_HEIGHT
+            sprite = pygame.Surface((w + 11, h + 11))
+            sprite.fill(COLORKEY)
+            body = pygame.Rect(5, 0, w, h)
+            pygame.draw.rect(sprite, ROCKET_COLOR, body)
+            pygame.draw.rect(sprite, WHITE, body, 2)
+
+            # Rocket flame
+            flame_points = [(5, h), (0, h + 10), (w + 10, h + 10)]
+            pygame.draw.polygon(sprite, (255, 200, 100), flame_points)
+            pygame.draw.polygon(sprite, WHITE, flame_points, 1)
+            sprite = _finish(sprite, scale)
+            sprite.set_colorkey(COLORKEY, pygame.RLEACCEL)
+            self.surfaces[key] = sprite
+        return sprite
+
+    def player(self, scale=1.0):
+        key = ("player", scale)
+        sprite = self.surfaces.get(key)
+        if sprite is None:
+            size = PLAYER_SIZE
+            sprite = pygame.Surface((size, size))
+            rect = sprite.get_rect()
+            pygame.draw.rect(sprite, PLAYER_COLOR, rect)
+            pygame.draw.rect(sprite, WHITE, rect, 2)
+
+            # Player details
+            pygame.draw.rect(sprite, (200, 200, 230),
+                             (size//4, size//4, size//2, size//2))
+            sprite = self.surfaces[key] = _finish(sprite, scale)
+        return sprite
+
+
+# Shared by all entities
+sprites = SpriteCache()
@@ -0,0 +1,64 @@
+import random
+import pygame
+from constants import WIDTH, HEIGHT, WHITE, STAR_DENSITY, STAR_LAYERS
+
+COLORKEY = (255, 0, 255)
+
+
+class Starfield:
+    """Parallax star background built from a few pre-rendered layers.
+
+    Each layer is a screen-sized, vertically tileable surface scrolled at
+    its own speed, so drawing costs two blits per layer regardless of how
+    many stars there are. ``density`` is the number of stars per screen,
+    and ``scale`` the pixels per world unit of the render target.
+    """
+
+    def __init__(self, density=STAR_DENSITY, layers=STAR_LAYERS, rng=random, scale=1.0):
+        self.width = max(1, round(WIDTH * scale))
+        self.height = max(1, round(HEIGHT * scale))
+        self.layers = []
+        self.speeds = []
+        self.offsets = [0.0] * layers
+        for i in range(layers):
+            # Farther layers hold smaller, slower stars
+            low, high = i / layers, (i + 1) / layers
+            self.speeds.append((0.2 + 0.6 * (low + high) / 2) * 6 * scale)  # pixels per second
+            self.layers.append(self._render_layer(
+                density // layers + (i < density % layers),
+                0.5 + 1.5 * low, 0.5 + 1.5 * high, rng, scale))
+
+    def _render_layer(self, count, min_size, max_size, rng, scale):
+        layer = pygame.Surface((self.width, self.height))
+        layer.fill(COLORKEY)
+        for _ in range(count):
+            x = rng.randint(0, WIDTH) * scale
+            y = rng.randint(0, HEIGHT) * scale
+            # Never under half a pixel, so stars survive small render targets
+            size = max(rng.uniform(min_size, max_size) * scale, 0.5)
+            # Draw the star on both sides of the seam so the layer tiles
+            pygame.draw.circle(layer, WHITE, (x, y), size)
+            pygame.draw.circle(layer, WHITE, (x, y - self.height), size)
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        layer.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        return layer
+
+    def scroll(self, seconds):
+        """Position every layer for time ``seconds``. Returns True if the image moved."""
+        moved = False
+        for i, speed in enumerate(self.speeds):
+            before = int(self.offsets[i])
+            self.offsets[i] = speed * seconds % self.height
+            moved = moved or int(self.offsets[i]) != before
+        return moved
+
+    def draw(self, surface, rect=None):
+        """Draw the layers, optionally limited to ``rect``."""
+        area = surface.get_rect() if rect is None else pygame.Rect(rect)
+        for layer, offset in zip(self.layers, self.offsets):
+            for top in (int(offset), int(offset) - self.height):
+                tile = pygame.Rect(0, top, self.width, self.height)
+                clip = area.clip(tile)
+                if clip.width and clip.height:
+                    surface.blit(layer, clip, clip.move(0, -top))
@@ -0,0 +1,187 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+# Read once here: reading the umask means setting it, which isn't safe
+# once other threads may be creating files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_write_json(path, data):
+    """Write ``data`` as JSON so that ``path`` is always either old or new, never partial.
+
+    The file keeps the mode it had, or gets the one ``open`` would give a
+    new file, rather than mkstemp's owner-only 0600.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class BackgroundWriter:
+    """Runs file writes on a daemon thread, off the game loop.
+
+    Jobs run in submission order. A job submitted under a key that is
+    still pending replaces the pending one and moves to the back of the
+    queue, so repeated saves of the same file coalesce into one write.
+    Pending jobs are flushed at interpreter exit.
+    """
+
+    def __init__(self):
+        self.pending = OrderedDict()
+        self.lock = threading.Condition()
+        self.busy = False
+        self.sequence = 0
+        self.thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, key, job):
+        """Queue ``job()``; a pending job with the same ``key`` is replaced."""
+        with self.lock:
+            self.pending.pop(key, None)
+            self.pending[key] = job
+            self.lock.notify_all()
+
+    def append(self, job):
+        """Queue ``job()`` without coalescing (e.g. an append to a log)."""
+        with self.lock:
+            self.sequence += 1
+            self.pending[("append", self.sequence)] = job
+            self.lock.notify_all()
+
+    def write_json(self, path, data):
+        self.submit(path, lambda: atomic_write_json(path, data))
+
+    def flush(self, timeout=5.0):
+        """Block until every queued job has run (or ``timeout`` passes)."""
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            while self.pending or self.busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.lock.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while not self.pending:
+                    self.lock.wait()
+                _, job = self.pending.popitem(last=False)
+                self.busy = True
+            try:
+                job()
+            except OSError:
+                pass  # If saving fails, ignore
+            finally:
+                with self.lock:
+                    self.busy = False
+                    self.lock.notify_all()
+
+
+class ScoreHistory:
+    """Append-only log of every finished run plus a top-N index per difficulty.
+
+    The log (one JSON line per run) is never rewritten. The index holds the
+    leaderboards and the log size they cover, so startup reads a small
+    fixed-size file and only scans log lines written after the index (for
+    instance after a crash between the two writes).
+    """
+
+    def __init__(self, log_path, index_path, writer, size=10):
+        self.log_path = log_path
+        self.index_path = index_path
+        self.writer = writer
+        self.size = size
+        self.leaderboards = {}
+        self.load()
+
+    def load(self):
+        covered = 0
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            self.leaderboards = index["leaderboards"]
+            covered = index["log_size"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.leaderboards = {}
+
+        # Catch up on runs logged after the index was written
+        try:
+            with open(self.log_path, "rb") as f:
+                if covered > os.fstat(f.fileno()).st_size:
+                    covered = 0  # Log was replaced; rebuild from scratch
+                    self.leaderboards = {}
+                f.seek(covered)
+                for line in f:
+                    try:
+                        run = json.loads(line)
+                        self._insert(run["difficulty"], run)
+                    except (ValueError, KeyError, TypeError):
+                        pass  # Torn last line from a crash
+        except OSError:
+            pass
+
+    def _insert(self, difficulty, run):
+        """Add ``run`` to its leaderboard and return its 1-based rank, or None."""
+        board = self.leaderboards.setdefault(difficulty, [])
+        rank = 0
+        while rank < len(board) and board[rank]["score"] >= run["score"]:
+            rank += 1
+        if rank >= self.size:
+            return None
+        board.insert(rank, run)
+        del board[self.size:]
+        return rank + 1
+
+    def add(self, difficulty, score):
+        """Record a finished run and return its leaderboard rank, or None."""
+        run = {"difficulty": difficulty, "score": score, "time": int(time.time())}
+        rank = self._insert(difficulty, run)
+        line = json.dumps(run) + "\n"
+        self.writer.append(lambda: self._append(line))
+        if rank is not None:
+            snapshot = json.loads(json.dumps(self.leaderboards))
+            self.writer.submit(self.index_path, lambda: self._write_index(snapshot))
+        return rank
+
+    def top(self, difficulty):
+        return self.leaderboards.get(difficulty, [])
+
+    def _append(self, line):
+        with open(self.log_path, "a+b") as f:
+            # Don't glue the new run onto a line torn by a crash
+            if f.seek(0, os.SEEK_END) and (f.seek(-1, os.SEEK_END), f.read(1))[1] != b"\n":
+                line = "\n" + line
+            f.write(line.encode())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_index(self, leaderboards):
+        try:
+            log_size = os.path.getsize(self.log_path)
+        except OSError:
+            log_size = 0
+        atomic_write_json(self.index_path,
+                          {"leaderboards": leaderboards, "log_size": log_size})
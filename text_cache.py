@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+TEXT_CACHE_SIZE = 128
+
+
+class TextCache:
+    """Rendered text surfaces keyed by (font, text, color, antialias).
+
+    Holds at most ``maxsize`` surfaces and evicts the least recently used
+    one, so static labels render once and changing values (like the score)
+    only render when they change.
+    """
+
+    def __init__(self, maxsize=TEXT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+# Shared by the game HUD, the menu and buttons
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    """Render ``text`` through the shared text cache."""
+    return text_cache.render(font, text, color, antialias)